@@ -5,12 +5,37 @@ import os
 import warnings
 warnings.filterwarnings("ignore")
 
+import gradio as gr
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
 from ui import create_ui
+from metrics import render_prometheus
+from config import EXPORT_DIR, GRADIO_MAX_THREADS, GRADIO_QUEUE_MAX_SIZE
 
-if __name__ == "__main__":
+
+def create_app() -> FastAPI:
+    """The Gradio UI mounted on a FastAPI app that also serves /metrics from this process."""
     demo = create_ui()
-    demo.queue()
+    # Per-event concurrency is set in ui.create_ui (scheduler pools); cap the overall queue here.
+    # launch() is not used, so the thread limit is set directly (before queue(), which reads it).
+    demo.max_threads = GRADIO_MAX_THREADS
+    demo.queue(max_size=GRADIO_QUEUE_MAX_SIZE)
+
+    app = FastAPI()
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        """Prometheus metrics endpoint (stage latencies, token counts, request counts). Async: needs no worker thread."""
+        return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+    # Exports may live outside Gradio's temp dir and the cwd (ATLASMIND_EXPORT_DIR); allow serving them
+    return gr.mount_gradio_app(app, demo, path="/", allowed_paths=[EXPORT_DIR])
+
+
+if __name__ == "__main__":
     port = int(os.environ.get("PORT", 7860))
-    # Use 0.0.0.0 for deployment (Render/Railway); 127.0.0.1 for local to avoid Gradio localhost error
+    # Use 0.0.0.0 for deployment (Render/Railway); 127.0.0.1 for local
     host = "0.0.0.0" if os.environ.get("PORT") else "127.0.0.1"
-    demo.launch(server_name=host, server_port=port, share=False)
+    uvicorn.run(create_app(), host=host, port=port)
@@ -0,0 +1,3 @@
+"""
+Offline benchmarks for AtlasMind. Run from the repo root: python -m benchmarks.run
+"""
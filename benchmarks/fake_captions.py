@@ -0,0 +1,98 @@
+"""
+Local stand-in for YouTube caption downloads.
+
+Serves GET /captions/<video_id>.json3 and /captions/<video_id>.vtt with
+synthetic captions, and builds yt-dlp-shaped metadata pointing at them, so the
+in-memory fetch path (_pick_caption_track, _download_caption) runs without
+network access.
+
+    python -m benchmarks.fake_captions --port 8766
+"""
+
+import argparse
+import json
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+from benchmarks.fixtures import make_json3, make_vtt
+
+_PATH_RE = re.compile(r"^/captions/([\w-]+)\.(json3|vtt)$")
+
+
+class FakeCaptionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    words = 20000  # caption length per video
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate small writes; with Nagle plus delayed ACK each reply waits ~40 ms
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        match = _PATH_RE.match(self.path.split("?")[0])
+        if not match:
+            self.send_error(404)
+            return
+        video_id, ext = match.groups()
+        seed = sum(map(ord, video_id))
+        if ext == "json3":
+            payload = json.dumps(make_json3(self.words, seed=seed)).encode("utf-8")
+            content_type = "application/json"
+        else:
+            payload = make_vtt(self.words, seed=seed).encode("utf-8")
+            content_type = "text/vtt; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_fake_captions(port: int = 0, words: Optional[int] = None) -> ThreadingHTTPServer:
+    """Start the stub on a daemon thread. Its base URL is f"http://127.0.0.1:{server.server_port}"."""
+    handler = type("ConfiguredFakeCaptionHandler", (FakeCaptionHandler,), {
+        "words": words or FakeCaptionHandler.words,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-captions", daemon=True).start()
+    return server
+
+
+def caption_info(base_url: str, video_id: str, formats=("json3", "vtt"), automatic: bool = True) -> Dict:
+    """
+    yt-dlp extract_info output for a video whose English captions are served by
+    the stub. Pass formats=() for a video without captions.
+    """
+    tracks = [{"ext": ext, "url": f"{base_url}/captions/{video_id}.{ext}", "name": "English"} for ext in formats]
+    key = "automatic_captions" if automatic else "subtitles"
+    info = {"id": video_id, "title": f"Lecture {video_id}", "subtitles": {}, "automatic_captions": {}}
+    if tracks:
+        # A non-English track that must never be picked
+        info[key] = {"en": tracks, "de": [{"ext": "json3", "url": f"{base_url}/not-english.json3"}]}
+    return info
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local YouTube caption download stub")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--words", type=int, default=FakeCaptionHandler.words)
+    args = parser.parse_args()
+    server = start_fake_captions(args.port, args.words)
+    print(f"Fake captions listening on http://127.0.0.1:{server.server_port}/captions/<video_id>.json3|vtt")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
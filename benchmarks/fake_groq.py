@@ -0,0 +1,129 @@
+"""
+Local stand-in for the Groq / OpenAI chat completions API.
+
+Serves POST .../chat/completions with canned answers (quiz prompts get
+well-formed quiz blocks), a configurable time-to-first-token and per-token
+delay, and SSE streaming when the request sets "stream": true.
+
+    python -m benchmarks.fake_groq --port 8765 --latency 0.2 --token-latency 0.002
+"""
+
+import argparse
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from benchmarks.fixtures import synthetic_quiz_response, synthetic_text
+
+
+class FakeGroqHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.0  # seconds before the first token
+    token_latency = 0.0  # seconds per completion token
+    completion_words = 300
+
+    def setup(self):
+        super().setup()
+        # Headers and body are separate small writes; with Nagle plus delayed ACK each reply waits ~40 ms
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, *args):
+        pass
+
+    def _reply_for(self, prompt: str, max_tokens: int) -> str:
+        match = re.search(r"Create (\d+) multiple choice questions", prompt)
+        if match:
+            return synthetic_quiz_response(int(match.group(1)))
+        return synthetic_text(min(self.completion_words, max_tokens), seed=len(prompt))
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_error(404)
+            return
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        prompt = "\n".join(m.get("content", "") for m in body.get("messages", []))
+        reply = self._reply_for(prompt, int(body.get("max_tokens") or 2000))
+        words = reply.split(" ")
+        usage = {
+            "prompt_tokens": max(1, len(prompt) // 4),
+            "completion_tokens": len(words),
+            "total_tokens": max(1, len(prompt) // 4) + len(words),
+        }
+        model = body.get("model", "fake-model")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        time.sleep(self.latency)
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i, word in enumerate(words):
+                time.sleep(self.token_latency)
+                chunk = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word if i == 0 else " " + word}, "finish_reason": None}],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            final = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"usage": usage},
+            }
+            self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+            self.close_connection = True
+            return
+
+        time.sleep(self.token_latency * len(words))
+        payload = json.dumps({
+            "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+            "usage": usage,
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def start_fake_groq(port: int = 0, latency: float = 0.0, token_latency: float = 0.0,
+                    completion_words: Optional[int] = None) -> ThreadingHTTPServer:
+    """Start the stub on a daemon thread. Its base URL is f"http://127.0.0.1:{server.server_port}"."""
+    handler = type("ConfiguredFakeGroqHandler", (FakeGroqHandler,), {
+        "latency": latency,
+        "token_latency": token_latency,
+        "completion_words": completion_words or FakeGroqHandler.completion_words,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-groq", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Groq/OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="seconds per completion token")
+    parser.add_argument("--completion-words", type=int, default=FakeGroqHandler.completion_words)
+    args = parser.parse_args()
+    server = start_fake_groq(args.port, args.latency, args.token_latency, args.completion_words)
+    print(f"Fake Groq listening on http://127.0.0.1:{server.server_port} (set GROQ_BASE_URL to this)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Deterministic synthetic inputs for the benchmarks: lecture-like text, PDFs,
+json3 / WebVTT caption files and LLM quiz responses.
+"""
+
+import json
+import random
+from pathlib import Path
+from typing import Dict, List
+
+_VOCABULARY = (
+    "gradient descent loss function neural network layer weight bias activation "
+    "backpropagation learning rate optimizer batch epoch training validation test "
+    "overfitting regularization dropout convolution pooling kernel stride feature "
+    "embedding attention transformer encoder decoder sequence token vocabulary "
+    "probability distribution entropy likelihood estimate variance covariance matrix "
+    "vector eigenvalue linear algebra calculus derivative integral theorem proof "
+    "the a of and to in is that for it as with on by this we can be are from"
+).split()
+
+
+def synthetic_text(n_words: int, seed: int = 0) -> str:
+    """Sentence-shaped filler drawn from a fixed lecture vocabulary."""
+    rng = random.Random(seed)
+    words: List[str] = []
+    while len(words) < n_words:
+        sentence = [rng.choice(_VOCABULARY) for _ in range(rng.randint(8, 20))]
+        sentence[0] = sentence[0].capitalize()
+        sentence[-1] += "."
+        words.extend(sentence)
+    return " ".join(words[:n_words])
+
+
+def make_pdf(path: Path, pages: int, words_per_page: int = 450, seed: int = 0) -> Path:
+    """Write a PDF with running header/footer lines and synthetic body text."""
+    import fitz  # PyMuPDF
+
+    doc = fitz.open()
+    for page_no in range(pages):
+        page = doc.new_page()
+        page.insert_text((50, 40), "Introduction to Machine Learning - Lecture Notes", fontsize=9)
+        body = synthetic_text(words_per_page, seed=seed * 100003 + page_no)
+        page.insert_textbox(fitz.Rect(50, 60, 560, 760), body, fontsize=9)
+        page.insert_text((50, 800), f"Page {page_no + 1} of {pages}  (c) 2024 AtlasMind University", fontsize=8)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def make_json3(n_words: int, seed: int = 0, words_per_event: int = 6) -> Dict:
+    """json3 caption data shaped like YouTube auto-captions."""
+    words = synthetic_text(n_words, seed=seed).split()
+    events = []
+    for i in range(0, len(words), words_per_event):
+        segs = [{"utf8": w if j == 0 else " " + w} for j, w in enumerate(words[i:i + words_per_event])]
+        events.append({"tStartMs": i * 400, "dDurationMs": 2400, "segs": segs})
+        events.append({"tStartMs": i * 400 + 2400, "segs": [{"utf8": "\n"}]})
+    return {"wireMagic": "pb3", "events": events}
+
+
+def make_vtt(n_words: int, seed: int = 0, words_per_cue: int = 6) -> str:
+    """WebVTT captions shaped like YouTube auto-captions (each cue repeats the previous line)."""
+    words = synthetic_text(n_words, seed=seed).split()
+    lines = [" ".join(words[i:i + words_per_cue]) for i in range(0, len(words), words_per_cue)]
+    cues = ["WEBVTT\nKind: captions\nLanguage: en"]
+    for i, line in enumerate(lines):
+        start, end = i * 2.4, (i + 1) * 2.4
+        previous = lines[i - 1] + "\n" if i else ""
+        cues.append(f"00:{int(start // 60):02d}:{start % 60:06.3f} --> 00:{int(end // 60):02d}:{end % 60:06.3f}\n"
+                    f"{previous}<c>{line}</c>")
+    return "\n\n".join(cues) + "\n"
+
+
+def write_json3(path: Path, n_words: int, seed: int = 0) -> Path:
+    path.write_text(json.dumps(make_json3(n_words, seed)), encoding="utf-8")
+    return path
+
+
+def synthetic_quiz_response(num_questions: int, seed: int = 0) -> str:
+    """An LLM quiz reply in the QUESTION/A-D/CORRECT/EXPLANATION format quiz.py parses."""
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(num_questions):
+        blocks.append("\n".join([
+            f"QUESTION: What does {synthetic_text(6, seed + i)} describe?",
+            *(f"{letter}: {synthetic_text(5, seed + i * 7 + n)}" for n, letter in enumerate("ABCD")),
+            f"CORRECT: {rng.choice('ABCD')}",
+            f"EXPLANATION: {synthetic_text(30, seed + i * 11)}",
+        ]))
+    return "\n###\n".join(blocks)
@@ -0,0 +1,260 @@
+"""
+Offline benchmark harness for AtlasMind.
+
+Starts the local fake Groq and caption servers, uses the stub embedding model (unless
+--embeddings model), generates synthetic fixtures and measures
+caption download, ingestion throughput, semantic_search and answer_question latency, quiz parse
+throughput and peak RSS. Results are written as JSON; pass --baseline to
+compare against an earlier run and exit non-zero on regressions.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --tolerance 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from benchmarks.fake_captions import caption_info, start_fake_captions
+from benchmarks.fake_groq import start_fake_groq
+from benchmarks.fixtures import make_json3, make_pdf, synthetic_quiz_response, synthetic_text
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _latency_ms(fn: Callable[[], object], iterations: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(_percentile(samples, 50), 3),
+        "p99_ms": round(_percentile(samples, 99), 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+    }
+
+
+def _best_seconds(fn: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _current_rss_mb() -> float:
+    """Resident set size right now (Linux /proc), or 0 where unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.TimeoutExpired):
+        return "unknown"
+
+
+def run_benchmarks(args) -> Dict:
+    server = start_fake_groq(latency=args.llm_latency, token_latency=args.llm_token_latency)
+    os.environ["GROQ_API_KEY"] = "bench-key"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+    if args.embeddings == "stub":
+        import embedding_service
+        from benchmarks.stub_embeddings import StubEncoder
+        # vector_db loads its local model through this function when first imported
+        embedding_service.load_local_model = StubEncoder
+
+    # Imported after the environment and embedding_service point the LLM client and embedder at the stubs
+    from pdf import extract_text_from_pdf
+    from quiz import _parse_quiz_response
+    from vector_db import chunk_text, semantic_search, store_in_vector_db
+    from youtube import _fetch_in_memory, _transcript_from_json3
+    import rag
+
+    results: Dict[str, Dict] = {}
+    work = Path(tempfile.mkdtemp(prefix="atlasmind_bench_"))
+
+    # ---- PDF extraction ----
+    pdf_path = make_pdf(work / "lecture.pdf", args.pdf_pages)
+    extracted = extract_text_from_pdf(str(pdf_path))
+    seconds = _best_seconds(lambda: extract_text_from_pdf(str(pdf_path)), args.repeats)
+    results["pdf_extract"] = {"pages": args.pdf_pages, "seconds": round(seconds, 4),
+                              "pages_per_s": round(args.pdf_pages / seconds, 1)}
+    text = extracted["transcript"]
+
+    # ---- json3 transcript parsing ----
+    captions = make_json3(args.transcript_words)
+    seconds = _best_seconds(lambda: _transcript_from_json3(captions), args.repeats)
+    results["json3_parse"] = {"words": args.transcript_words, "seconds": round(seconds, 4),
+                              "words_per_s": round(args.transcript_words / seconds, 1)}
+
+    # ---- Caption fetch (track choice + in-memory download) against the local caption server ----
+    captions_server = start_fake_captions(words=args.transcript_words)
+    captions_url = f"http://127.0.0.1:{captions_server.server_port}"
+    for ext in ("json3", "vtt"):
+        info = caption_info(captions_url, "benchvideo01", formats=(ext,))
+        fetched = _fetch_in_memory("benchvideo01", info)
+        if not (fetched and fetched["success"]):
+            raise RuntimeError(f"{ext} caption fetch failed: {fetched}")
+        seconds = _best_seconds(lambda: _fetch_in_memory("benchvideo01", info), args.repeats)
+        results[f"caption_fetch_{ext}"] = {"words": len(fetched["transcript"].split()), "seconds": round(seconds, 4),
+                                           "words_per_s": round(len(fetched["transcript"].split()) / seconds, 1)}
+    no_captions = _fetch_in_memory("benchvideo02", caption_info(captions_url, "benchvideo02", formats=()))
+    if not no_captions or no_captions["success"]:
+        raise RuntimeError(f"expected a definitive no-captions result, got {no_captions}")
+    captions_server.shutdown()
+
+    # ---- Chunking ----
+    chunks = chunk_text(text)
+    seconds = _best_seconds(lambda: chunk_text(text), args.repeats)
+    results["chunk"] = {"chunks": len(chunks), "seconds": round(seconds, 4),
+                        "chunks_per_s": round(len(chunks) / seconds, 1)}
+
+    # ---- Embedding + vector store (cold, then an incremental re-index) ----
+    start = time.perf_counter()
+    collection = store_in_vector_db("bench_pdf", text, "Benchmark lecture", "pdf")
+    seconds = time.perf_counter() - start
+    results["index"] = {"chunks": len(chunks), "seconds": round(seconds, 4),
+                        "chunks_per_s": round(len(chunks) / seconds, 1)}
+    revised = text[: len(text) // 2] + " An added remark about dropout. " + text[len(text) // 2:]
+    start = time.perf_counter()
+    store_in_vector_db("bench_pdf_v2", revised, "Benchmark lecture", "pdf")
+    results["reindex_small_edit"] = {"seconds": round(time.perf_counter() - start, 4)}
+
+    # ---- Resident memory per loaded document ----
+    import gc
+    docs = [synthetic_text(len(text.split()), seed=500 + i) for i in range(args.rss_docs)]
+    gc.collect()
+    before = _current_rss_mb()
+    for i, doc in enumerate(docs):
+        store_in_vector_db(f"bench_rss_{i}", doc, f"RSS document {i}", "pdf")
+    del docs
+    gc.collect()
+    results["memory_per_document"] = {
+        "documents": args.rss_docs,
+        "chars_per_document": len(text),
+        "rss_per_document_mb": round((_current_rss_mb() - before) / args.rss_docs, 3),
+    }
+
+    # ---- semantic_search ----
+    queries = [synthetic_text(12, seed=1000 + i) for i in range(args.search_queries)]
+    query_iter = iter(queries * 2)
+    results["semantic_search"] = _latency_ms(lambda: semantic_search(next(query_iter), collection),
+                                             args.search_queries)
+
+    # ---- End-to-end ingestion and answer_question through the fake LLM ----
+    start = time.perf_counter()
+    rag._process_content_text("bench_e2e", text, "PDF", "pdf", "Benchmark e2e")
+    results["ingest_e2e"] = {"seconds": round(time.perf_counter() - start, 4)}
+    question_iter = iter(queries * 2)
+
+    def ask_fresh():
+        # Clear the history first so every sample is a single-turn question (no rewrite / memory calls)
+        rag.clear_conversation("pdf", "bench")
+        return rag.answer_question(next(question_iter), "pdf", session_id="bench")
+
+    results["answer_question"] = _latency_ms(ask_fresh, args.qa_iterations)
+
+    # ---- Quiz parsing ----
+    response = synthetic_quiz_response(15)
+    iterations = 200
+    seconds = _best_seconds(lambda: [_parse_quiz_response(response) for _ in range(iterations)], args.repeats)
+    results["quiz_parse"] = {"questions": 15 * iterations, "seconds": round(seconds, 4),
+                             "questions_per_s": round(15 * iterations / seconds, 1)}
+
+    results["memory"] = {"peak_rss_mb": _peak_rss_mb()}
+    server.shutdown()
+    return {
+        "meta": {
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "llm_latency_s": args.llm_latency,
+            "llm_token_latency_s": args.llm_token_latency,
+            "embeddings": args.embeddings,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    List regressions beyond tolerance. Keys ending in _per_s are higher-is-better;
+    _ms, seconds and _mb are lower-is-better.
+    """
+    regressions = []
+    for group, metrics in current["results"].items():
+        for key, value in metrics.items():
+            old = baseline.get("results", {}).get(group, {}).get(key)
+            if not isinstance(old, (int, float)) or not old:
+                continue
+            if key.endswith("_per_s"):
+                change = (old - value) / old
+            elif key.endswith(("_ms", "_mb")) or key == "seconds":
+                change = (value - old) / old
+            else:
+                continue
+            if change > tolerance:
+                regressions.append(f"{group}.{key}: {old} -> {value} ({change:+.0%} worse)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AtlasMind offline benchmarks")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative slowdown")
+    parser.add_argument("--pdf-pages", type=int, default=60)
+    parser.add_argument("--transcript-words", type=int, default=20000)
+    parser.add_argument("--search-queries", type=int, default=200)
+    parser.add_argument("--qa-iterations", type=int, default=30)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--rss-docs", type=int, default=5, help="documents ingested for the RSS-per-document figure")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM time to first token")
+    parser.add_argument("--llm-token-latency", type=float, default=0.0, help="fake LLM seconds per token")
+    parser.add_argument("--embeddings", choices=["stub", "model"], default="stub",
+                        help="stub: offline hashed encoder; model: the real EMBEDDING_MODEL (downloads it)")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args)
+    if args.baseline:
+        report["regressions"] = compare(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+    for line in report.get("regressions", []):
+        print(f"REGRESSION {line}", file=sys.stderr)
+    sys.exit(1 if report.get("regressions") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""
+Offline stand-in for the sentence-transformer model, used by the benchmarks
+(benchmarks.run patches embedding_service.load_local_model) so they need no
+model download or torch.
+
+Vectors are hashed bag-of-words, normalized, with the real model's dimension, so
+Chroma storage and memory figures stay comparable; similarities are lexical only.
+"""
+
+import zlib
+from typing import List
+
+import numpy as np
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+
+
+class StubEncoder:
+    """Deterministic encode() with the SentenceTransformer call shape."""
+
+    def encode(self, texts: List[str], **kwargs) -> np.ndarray:
+        vectors = np.zeros((len(texts), DIMENSION), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[i, zlib.crc32(word.encode("utf-8")) % DIMENSION] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-9)
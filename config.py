@@ -3,6 +3,7 @@ Configuration and constants for AtlasMind
 """
 
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Load local .env file if it exists
@@ -19,15 +20,107 @@ if not GROQ_API_KEY:
 
 MODEL_NAME = "llama-3.1-8b-instant"
 
+# ==================== LLM Provider Configuration ====================
+# Optional secondary provider: any OpenAI-compatible endpoint (vLLM, llama.cpp, Ollama, ...)
+OPENAI_COMPAT_BASE_URL = os.getenv("OPENAI_COMPAT_BASE_URL", "")  # e.g. http://localhost:8000/v1
+OPENAI_COMPAT_API_KEY = os.getenv("OPENAI_COMPAT_API_KEY", "")
+OPENAI_COMPAT_MODEL = os.getenv("OPENAI_COMPAT_MODEL", "llama-3.1-8b-instruct")
+LLM_TIMEOUT = 60  # seconds per completion request
+
+# Providers in failover order; unconfigured ones are skipped
+LLM_PROVIDER_ORDER = ["groq", "openai_compat"]
+# In-flight requests at which a provider counts as saturated and traffic spills to the next one
+LLM_PROVIDER_MAX_IN_FLIGHT = {"groq": 16, "openai_compat": 8}
+
+# Per-task routing: model per provider, output budget and sampling temperature.
+# max_tokens is sized to each task's real output so the provider can schedule it tightly.
+LLM_ROUTES = {
+    "summary": {"models": {"groq": MODEL_NAME}, "max_tokens": 700, "temperature": 0.5},
+    "qa": {"models": {"groq": MODEL_NAME}, "max_tokens": 600, "temperature": 0.3},
+    "rewrite": {"models": {"groq": MODEL_NAME}, "max_tokens": 80, "temperature": 0.0},
+    "memory": {"models": {"groq": MODEL_NAME}, "max_tokens": 250, "temperature": 0.3},
+    "notes": {"models": {"groq": MODEL_NAME}, "max_tokens": 2000, "temperature": 0.5},
+    "quiz": {"models": {"groq": MODEL_NAME}, "max_tokens": 2400, "temperature": 0.7},
+    "default": {"models": {"groq": MODEL_NAME}, "max_tokens": 2000, "temperature": 0.7},
+}
+QUIZ_TOKENS_PER_QUESTION = 160  # quiz max_tokens = this * number of questions (capped by the route)
+# Q&A memory: recent turns kept verbatim up to this many tokens (~4 chars each, several
+# qa answers); beyond it the oldest are folded, in the background, into a rolling summary
+# capped by the "memory" route's max_tokens until half the budget is left
+QA_HISTORY_TOKEN_BUDGET = 3000
+CONVERSATION_TTL = 24 * 3600  # seconds an idle browser session's Q&A history is kept
+
 # ==================== Vector Database Configuration ====================
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
+# Optional shared embedding service (python embedding_service.py); workers then skip loading torch
+EMBEDDING_SERVICE_SOCKET = os.getenv("EMBEDDING_SERVICE_SOCKET", "")
+EMBEDDING_BATCH_SIZE = 64  # max texts per model call in the service
+EMBEDDING_BATCH_WINDOW = 0.005  # seconds the service waits to batch requests from other workers
+GLOBAL_COLLECTION_NAME = "atlasmind_global"  # cross-document index over all ingested content
+GLOBAL_SEARCH_TOP_K = 6
+EMBED_BATCH_SIZE = 256  # chunk strings materialized per embedding call
+REINDEX_MIN_OVERLAP = 0.5  # chunk overlap (Jaccard) for treating an upload as a new version
+CONTEXT_SELECTION_DIVERSITY = 0.3  # MMR weight against redundancy when packing summary/notes/quiz context
+# Pre-embedding filters (dedup.py)
+BOILERPLATE_MIN_PAGES = 3  # only look for running headers/footers in PDFs with at least this many pages
+BOILERPLATE_PAGE_FRACTION = 0.5  # a top/bottom line repeated on this share of pages is boilerplate
+BOILERPLATE_EDGE_LINES = 3  # lines checked at the top and bottom of each page
+BOILERPLATE_MAX_LINE_LENGTH = 120
+SIMHASH_SHINGLE_WORDS = 3
+NEAR_DUPLICATE_MAX_DISTANCE = 3  # SimHash bits (of 64) within which two chunks count as duplicates
+
+# ==================== YouTube Configuration ====================
+CAPTION_LANGS = ["en", "en-orig"]  # preferred caption languages, best first
+CAPTION_FORMATS = ["json3", "vtt"]  # preferred caption formats, best first
+CAPTION_HTTP_TIMEOUT = 20  # seconds per caption download
+PLAYLIST_MAX_VIDEOS = 50  # videos enumerated from one playlist/channel URL
+TRANSCRIPT_FETCH_CONCURRENCY = 4  # transcripts fetched in parallel for a playlist
+YOUTUBE_POLITENESS_DELAY = 0.5  # minimum seconds between requests to YouTube
+TRANSCRIPT_RETRY_ATTEMPTS = 3  # background retries for videos that failed in a batch
+TRANSCRIPT_RETRY_BACKOFF = 10  # seconds before the first retry (doubles each attempt)
+
+# ==================== Shared State Configuration ====================
+# Empty = in-process state (single worker). redis://host:6379/0 shares sessions across workers/nodes.
+STATE_BACKEND_URL = os.getenv("STATE_BACKEND_URL", "")
+STATE_LOCK_TIMEOUT = 120  # seconds a cross-worker lock may be held / waited for
+TEXT_PAGE_CHARS = 16384  # document text is stored in pages so search hits fetch only what they need
+# Set CHROMA_HOST to use a shared Chroma server instead of the in-process client
+CHROMA_HOST = os.getenv("CHROMA_HOST", "")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8000"))
 
 # ==================== Quiz Configuration ====================
 QUIZ_CONTEXT_LENGTH = 6000
 TRANSCRIPT_PREVIEW_LENGTH = 8000
 
+# ==================== Export Configuration ====================
+# Rendered notes (DOCX / Markdown / PDF), cached by content hash and cleaned up by age and size
+EXPORT_DIR = os.getenv("ATLASMIND_EXPORT_DIR", os.path.join(tempfile.gettempdir(), "atlasmind_exports"))
+EXPORT_MAX_AGE = 24 * 3600  # seconds
+EXPORT_MAX_BYTES = 200 * 1024 * 1024
+EXPORT_CONCURRENCY = 4  # export renders at once, shared by both tabs (cached files return immediately)
+
+# ==================== Observability Configuration ====================
+# Optional path for per-request JSON trace lines (stage timings, token counts)
+METRICS_TRACE_LOG = os.getenv("METRICS_TRACE_LOG", "")
+
+# ==================== Scheduling Configuration ====================
+# Separate pools per event class; quiz navigation bypasses the queue entirely.
+SCHEDULER_POOLS = {
+    "ingest": {"concurrency": 2, "max_waiting": 6},  # video/PDF processing
+    # Q&A (interactive) before notes/quiz (bulk); 8 queue places are kept for Q&A only
+    "llm": {"concurrency": 8, "max_waiting": 20, "interactive_reserve": 8},
+}
+GRADIO_QUEUE_MAX_SIZE = 64  # overall Gradio queue bound
+# Pool waiters hold a worker thread, so the thread limit covers every pool place and
+# export slot plus headroom for quiz navigation, pre/postprocessing and QueueFull replies
+GRADIO_THREAD_HEADROOM = 16
+GRADIO_MAX_THREADS = (
+    sum(pool["concurrency"] + pool["max_waiting"] for pool in SCHEDULER_POOLS.values())
+    + EXPORT_CONCURRENCY + GRADIO_THREAD_HEADROOM
+)
+
 # ==================== UI Configuration ====================
 # Removed emoji for a cleaner, professional structured look.
 APP_TITLE = "AtlasMind"
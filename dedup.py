@@ -0,0 +1,129 @@
+"""
+Pre-embedding filters for AtlasMind: repeated PDF header/footer lines,
+caption filler, and near-duplicate chunks (SimHash over word shingles).
+"""
+
+import re
+import zlib
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+
+from metrics import FILTERED
+from config import (
+    BOILERPLATE_EDGE_LINES, BOILERPLATE_MAX_LINE_LENGTH, BOILERPLATE_MIN_PAGES, BOILERPLATE_PAGE_FRACTION,
+    NEAR_DUPLICATE_MAX_DISTANCE, SIMHASH_SHINGLE_WORDS,
+)
+
+_CAPTION_FILLER_RE = re.compile(r"\[[^\]]{1,40}\]|>>|\b(?:um+|uh+|erm)\b[,.]?", re.IGNORECASE)
+_SPACES_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+_WORD_RE = re.compile(r"\w+")
+
+
+def _line_signature(line: str) -> str:
+    """Normalize a line so 'Page 3 of 40' and 'Page 4 of 40' compare equal."""
+    return _SPACES_RE.sub(" ", _DIGITS_RE.sub("#", line.lower())).strip()
+
+
+def strip_repeated_lines(pages: List[str]) -> Tuple[List[str], int]:
+    """
+    Drop running headers, footers, page numbers and copyright lines: short lines
+    that recur at the same top or bottom position on at least
+    BOILERPLATE_PAGE_FRACTION of pages (ignoring digits).
+
+    Returns:
+        (cleaned pages, number of lines dropped)
+    """
+    if len(pages) < BOILERPLATE_MIN_PAGES:
+        return pages, 0
+
+    split_pages = [page.split("\n") for page in pages]
+    page_edges = [_edge_positions(lines) for lines in split_pages]
+    page_counts: Counter = Counter()
+    for lines, edges in zip(split_pages, page_edges):
+        page_counts.update({(pos, _line_signature(lines[i])) for i, pos in edges.items()})
+    threshold = max(2, BOILERPLATE_PAGE_FRACTION * len(pages))
+    repeated = {key for key, n in page_counts.items() if key[1] and n >= threshold}
+    if not repeated:
+        return pages, 0
+
+    cleaned, dropped = [], 0
+    for lines, edges in zip(split_pages, page_edges):
+        kept = []
+        for i, line in enumerate(lines):
+            if i in edges and (edges[i], _line_signature(line)) in repeated:
+                dropped += 1
+            else:
+                kept.append(line)
+        cleaned.append("\n".join(kept))
+    FILTERED.inc(dropped, kind="boilerplate_line")
+    return cleaned, dropped
+
+
+def _edge_positions(lines: List[str]) -> Dict[int, str]:
+    """
+    Map line index -> position ('top0', 'bottom1', ...) for the short lines among the
+    first and last BOILERPLATE_EDGE_LINES non-empty lines of a page. Pages with too
+    few lines to have a distinct top and bottom (slides) are skipped, so their
+    content is never mistaken for a header.
+    """
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    if len(non_empty) <= 2 * BOILERPLATE_EDGE_LINES:
+        return {}
+    positions: Dict[int, str] = {}
+    for k, i in enumerate(non_empty[:BOILERPLATE_EDGE_LINES]):
+        positions[i] = f"top{k}"
+    for k, i in enumerate(reversed(non_empty[-BOILERPLATE_EDGE_LINES:])):
+        positions[i] = f"bottom{k}"
+    return {i: pos for i, pos in positions.items() if len(lines[i]) <= BOILERPLATE_MAX_LINE_LENGTH}
+
+
+def strip_caption_filler(text: str) -> str:
+    """Remove sound tags ([Music], [Applause]), speaker-change markers (>>) and um/uh."""
+    cleaned, dropped = _CAPTION_FILLER_RE.subn("", text)
+    if dropped:
+        FILTERED.inc(dropped, kind="caption_filler")
+    return _SPACES_RE.sub(" ", cleaned).strip()
+
+
+def simhash(text: str, shingle: int = SIMHASH_SHINGLE_WORDS) -> int:
+    """64-bit SimHash over word shingles; similar texts differ in few bits."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1)]
+    hashes = np.fromiter(
+        (zlib.crc32(data) | (zlib.crc32(data, 0x9E3779B9) << 32) for data in (sh.encode("utf-8") for sh in shingles)),
+        dtype="<u8", count=len(shingles),
+    )
+    # One row of 64 bits per shingle; a bit is set in the SimHash where most shingles set it
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    majority = bits.sum(axis=0) * 2 > len(shingles)
+    return int(np.packbits(majority, bitorder="little").view("<u8")[0])
+
+
+def near_duplicates(texts: Iterable[str], max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE) -> Set[int]:
+    """
+    Indices of texts that nearly duplicate an earlier one (SimHash Hamming
+    distance <= max_distance). Candidates come from banded LSH buckets, so
+    this stays close to linear rather than comparing every pair.
+    """
+    bands = max_distance + 1  # pigeonhole: near-duplicates agree on at least one band
+    width = 64 // bands
+    mask = (1 << width) - 1
+    buckets = defaultdict(list)
+    hashes: List[int] = []
+    duplicates: Set[int] = set()
+    for i, text in enumerate(texts):
+        h = simhash(text)
+        hashes.append(h)
+        keys = [(b, (h >> (b * width)) & mask) for b in range(bands)]
+        if any(bin(h ^ hashes[j]).count("1") <= max_distance for key in keys for j in buckets[key]):
+            duplicates.add(i)
+            continue
+        for key in keys:
+            buckets[key].append(i)
+    return duplicates
@@ -0,0 +1,206 @@
+"""
+Shared embedding-model service for multi-worker deployments.
+
+One process loads torch and the sentence-transformer model and serves
+embeddings over a local Unix socket; every web worker talks to it through
+RemoteEncoder, which has the same encode() interface as SentenceTransformer.
+Requests arriving from different workers are batched together.
+
+    python embedding_service.py --socket /tmp/atlasmind-embed.sock
+    EMBEDDING_SERVICE_SOCKET=/tmp/atlasmind-embed.sock python app.py
+"""
+
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from config import EMBEDDING_MODEL, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WINDOW
+
+_HEADER = struct.Struct("!I")
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        part = sock.recv(size - len(buf))
+        if not part:
+            raise ConnectionError("embedding service closed the connection")
+        buf.extend(part)
+    return bytes(buf)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return _recv_exact(sock, size)
+
+
+# ==================== Server ====================
+
+class _Batcher:
+    """Collects encode requests from all connections and runs them through the model together."""
+
+    def __init__(self, model, batch_size: int, window: float):
+        self.model = model
+        self.batch_size = batch_size
+        self.window = window
+        self._requests: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        threading.Thread(target=self._run, name="embedding-batcher", daemon=True).start()
+
+    def submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        self._requests.put((texts, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            count = len(batch[0][0])
+            deadline = time.monotonic() + self.window
+            while count < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                count += len(item[0])
+            texts = [t for item_texts, _ in batch for t in item_texts]
+            try:
+                vectors = np.asarray(self.model.encode(texts, batch_size=self.batch_size), dtype=np.float32)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            offset = 0
+            for item_texts, future in batch:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    batcher: _Batcher = None
+
+    def handle(self):
+        while True:
+            try:
+                request = json.loads(_recv_frame(self.request))
+            except (ConnectionError, OSError, ValueError):
+                return
+            try:
+                vectors = self.batcher.submit(list(request.get("texts", []))).result()
+                header = {"rows": int(vectors.shape[0]), "dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0}
+                _send_frame(self.request, json.dumps(header).encode("utf-8"))
+                _send_frame(self.request, vectors.tobytes())
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                _send_frame(self.request, json.dumps({"error": str(e)}).encode("utf-8"))
+
+
+class EmbeddingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128  # many workers may (re)connect at once
+
+
+def load_local_model():
+    """The EMBEDDING_MODEL sentence-transformer (the benchmarks replace this with a stub)."""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def serve(socket_path: str, model=None):
+    """Load the model (unless given) and serve on socket_path until interrupted."""
+    if model is None:
+        model = load_local_model()
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    handler = type("BoundHandler", (_Handler,), {"batcher": _Batcher(model, EMBEDDING_BATCH_SIZE, EMBEDDING_BATCH_WINDOW)})
+    server = EmbeddingServer(socket_path, handler)
+    os.chmod(socket_path, 0o660)
+    print(f"Embedding service ({EMBEDDING_MODEL}) listening on {socket_path}")
+    return server
+
+
+# ==================== Client ====================
+
+class RemoteEncoder:
+    """Drop-in for SentenceTransformer.encode backed by the embedding service (one connection per thread)."""
+
+    def __init__(self, socket_path: str, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock: Optional[socket.socket] = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _drop_connection(self):
+        sock = getattr(self._local, "sock", None)
+        self._local.sock = None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def encode(self, texts, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        payload = json.dumps({"texts": [texts] if single else list(texts)}).encode("utf-8")
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                _send_frame(sock, payload)
+                header = json.loads(_recv_frame(sock))
+                if "error" in header:
+                    raise RuntimeError(f"Embedding service error: {header['error']}")
+                data = _recv_frame(sock)
+                break
+            except (ConnectionError, OSError):
+                # Stale connection (e.g. service restarted): reconnect once
+                self._drop_connection()
+                if attempt:
+                    raise
+        vectors = np.frombuffer(data, dtype=np.float32).reshape(header["rows"], header["dim"])
+        return vectors[0] if single else vectors
+
+
+def main():
+    from config import EMBEDDING_SERVICE_SOCKET
+    parser = argparse.ArgumentParser(description="AtlasMind shared embedding service")
+    parser.add_argument("--socket", default=EMBEDDING_SERVICE_SOCKET or "/tmp/atlasmind-embed.sock")
+    args = parser.parse_args()
+    server = serve(args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Notes export store for AtlasMind.
+
+Exports are rendered on demand and cached on disk under a hash of the notes and
+format, so identical notes reuse one file. Old files are removed by age and the
+directory is kept under a size cap.
+"""
+
+import hashlib
+import html
+import os
+import re
+import tempfile
+import time
+from typing import Dict, Optional
+
+from metrics import instrument
+from config import EXPORT_DIR, EXPORT_MAX_AGE, EXPORT_MAX_BYTES
+
+_PREFIX = "atlasmind_notes_"
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+
+
+def _markdown_blocks(markdown_text: str):
+    """Yield (kind, text) for each non-empty line: kind is 'h1', 'h2', 'bullet' or 'p'."""
+    for line in markdown_text.replace("\r\n", "\n").split("\n"):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("###"):
+            yield "h2", stripped.lstrip("#").strip()
+        elif stripped.startswith("#"):
+            yield "h1", stripped.lstrip("#").strip()
+        elif stripped.startswith("- ") or stripped.startswith("* "):
+            yield "bullet", stripped[2:].strip()
+        else:
+            yield "p", stripped
+
+
+def _render_markdown(markdown_text: str, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(markdown_text)
+
+
+def _render_docx(markdown_text: str, path: str):
+    try:
+        from docx import Document
+    except ImportError:
+        raise ImportError("pip install python-docx")
+
+    doc = Document()
+    for kind, text in _markdown_blocks(markdown_text):
+        if kind == "h1":
+            doc.add_heading(text, level=1)
+        elif kind == "h2":
+            doc.add_heading(text, level=2)
+        elif kind == "bullet":
+            doc.add_paragraph(text, style="List Bullet")
+        else:
+            doc.add_paragraph(text)
+    doc.save(path)
+
+
+def _bold(match: re.Match) -> str:
+    return f"<b>{match.group(1)}</b>"
+
+
+def _render_pdf(markdown_text: str, path: str):
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        raise ImportError("pip install pymupdf")
+
+    tags = {"h1": "h1", "h2": "h2", "bullet": "li", "p": "p"}
+    body = "".join(
+        f"<{tags[kind]}>{_BOLD_RE.sub(_bold, html.escape(text))}</{tags[kind]}>"
+        for kind, text in _markdown_blocks(markdown_text)
+    )
+    story = fitz.Story(html=f"<body style='font-family: sans-serif'>{body}</body>")
+    writer = fitz.DocumentWriter(path)
+    page = fitz.paper_rect("a4")
+    where = page + (50, 50, -50, -50)
+    more = True
+    while more:
+        device = writer.begin_page(page)
+        more, _ = story.place(where)
+        story.draw(device)
+        writer.end_page()
+    writer.close()
+
+
+# Format -> (file extension, renderer)
+EXPORT_FORMATS: Dict[str, tuple] = {
+    "docx": (".docx", _render_docx),
+    "md": (".md", _render_markdown),
+    "pdf": (".pdf", _render_pdf),
+}
+
+
+@instrument("notes_export")
+def export_notes(markdown_text: str, fmt: str = "docx") -> Optional[str]:
+    """
+    Path of the notes rendered in the given format, reusing a cached file for
+    identical notes.
+
+    Args:
+        markdown_text: Notes in Markdown
+        fmt: 'docx', 'md' or 'pdf'
+
+    Returns:
+        File path, or None if the format is unknown or rendering failed
+    """
+    if fmt not in EXPORT_FORMATS or not markdown_text:
+        return None
+    suffix, render = EXPORT_FORMATS[fmt]
+    key = hashlib.sha256(f"{fmt}\0{markdown_text}".encode("utf-8")).hexdigest()[:20]
+    path = os.path.join(EXPORT_DIR, f"{_PREFIX}{key}{suffix}")
+    if os.path.exists(path):
+        os.utime(path)  # keep recently downloaded files through cleanup
+        return path
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix, prefix=".partial_", dir=EXPORT_DIR)
+    os.close(fd)
+    try:
+        render(markdown_text, tmp_path)
+        os.replace(tmp_path, path)  # atomic, so concurrent exports of the same notes never see half a file
+    except Exception as e:
+        print(f"Could not export notes as {fmt}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
+    cleanup_exports(keep=path)
+    return path
+
+
+def cleanup_exports(keep: str = "", max_age: float = EXPORT_MAX_AGE, max_bytes: int = EXPORT_MAX_BYTES) -> int:
+    """Delete exports older than max_age, then the least recently used until under max_bytes. Returns files removed."""
+    try:
+        names = [n for n in os.listdir(EXPORT_DIR) if n.startswith((_PREFIX, ".partial_"))]
+    except OSError:
+        return 0
+    now = time.time()
+    files = []
+    for name in names:
+        path = os.path.join(EXPORT_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    files.sort()
+
+    removed, total = 0, sum(size for _, size, _ in files)
+    for mtime, size, path in files:
+        expired = now - mtime > max_age
+        in_progress = os.path.basename(path).startswith(".partial_")
+        if path == keep or not (expired or (total > max_bytes and not in_progress)):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        removed += 1
+        total -= size
+    return removed
@@ -1,33 +1,150 @@
 """
-Groq LLM interface for AtlasMind
+LLM interface for AtlasMind: Groq or any OpenAI-compatible endpoint, with
+per-task routing (model, max_tokens, temperature) and failover between providers.
 """
 
+import threading
+from typing import Dict, List, Optional, Tuple
+
 from groq import Groq
-from config import GROQ_API_KEY, MODEL_NAME
+from config import (
+    GROQ_API_KEY, MODEL_NAME, OPENAI_COMPAT_BASE_URL, OPENAI_COMPAT_API_KEY, OPENAI_COMPAT_MODEL,
+    LLM_TIMEOUT, LLM_PROVIDER_ORDER, LLM_PROVIDER_MAX_IN_FLIGHT, LLM_ROUTES,
+)
+from metrics import LLM_FAILOVERS, record_tokens, timed
+
+
+class LLMProvider:
+    """A chat-completions backend with an in-flight counter for saturation checks."""
+    name = ""
+
+    def __init__(self, default_model: str, max_in_flight: int):
+        self.default_model = default_model
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    def saturated(self) -> bool:
+        return self._in_flight >= self.max_in_flight
+
+    def complete(self, messages: List[Dict], model: str, temperature: float, max_tokens: int) -> Tuple[str, Dict]:
+        """Run one completion. Returns (text, usage dict with prompt_tokens/completion_tokens)."""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return self._complete(messages, model, temperature, max_tokens)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _complete(self, messages, model, temperature, max_tokens) -> Tuple[str, Dict]:
+        raise NotImplementedError
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, api_key: str, default_model: str, max_in_flight: int, max_retries: int = 2):
+        super().__init__(default_model, max_in_flight)
+        self.client = Groq(api_key=api_key, timeout=LLM_TIMEOUT, max_retries=max_retries)
+
+    def _complete(self, messages, model, temperature, max_tokens):
+        completion = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        usage = completion.usage
+        return completion.choices[0].message.content, {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) if usage else 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) if usage else 0,
+        }
+
 
-# Initialize Groq client
-groq_client = Groq(api_key=GROQ_API_KEY)
+class OpenAICompatibleProvider(LLMProvider):
+    """Any server exposing POST {base_url}/chat/completions (OpenAI wire format)."""
+    name = "openai_compat"
 
+    def __init__(self, base_url: str, api_key: str, default_model: str, max_in_flight: int):
+        super().__init__(default_model, max_in_flight)
+        import httpx
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.Client(base_url=base_url.rstrip("/"), headers=headers, timeout=LLM_TIMEOUT)
 
-def ask_groq(prompt: str, context: str = "") -> str:
+    def _complete(self, messages, model, temperature, max_tokens):
+        response = self.client.post("/chat/completions", json={
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        })
+        response.raise_for_status()
+        data = response.json()
+        usage = data.get("usage") or {}
+        return data["choices"][0]["message"]["content"], {
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+        }
+
+
+def _build_providers() -> List[LLMProvider]:
+    available = {}
+    secondary = bool(OPENAI_COMPAT_BASE_URL)
+    if GROQ_API_KEY:
+        # With a fallback configured, fail over on rate limits instead of retrying in place
+        available["groq"] = GroqProvider(
+            GROQ_API_KEY, MODEL_NAME, LLM_PROVIDER_MAX_IN_FLIGHT.get("groq", 16),
+            max_retries=0 if secondary else 2,
+        )
+    if OPENAI_COMPAT_BASE_URL:
+        available["openai_compat"] = OpenAICompatibleProvider(
+            OPENAI_COMPAT_BASE_URL, OPENAI_COMPAT_API_KEY, OPENAI_COMPAT_MODEL,
+            LLM_PROVIDER_MAX_IN_FLIGHT.get("openai_compat", 8),
+        )
+    return [available[name] for name in LLM_PROVIDER_ORDER if name in available]
+
+
+providers = _build_providers()
+
+
+def _candidates() -> List[LLMProvider]:
+    """Providers in failover order, unsaturated ones first."""
+    return sorted(providers, key=lambda p: p.saturated())
+
+
+def ask_groq(prompt: str, context: str = "", task: str = "default", max_tokens: Optional[int] = None) -> str:
     """
-    Query Groq LLM with optional context
+    Query the LLM with optional context, routed by task
     
     Args:
         prompt: Main prompt/question
         context: Optional context for RAG
+        task: Routing key in LLM_ROUTES ('summary', 'qa', 'rewrite', 'memory', 'notes', 'quiz')
+        max_tokens: Optional cap below the route's max_tokens
     
     Returns:
         LLM response
     """
-    try:
-        full_prompt = f"{prompt}\n\nContext: {context}" if context else prompt
-        completion = groq_client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[{"role": "user", "content": full_prompt}],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        return completion.choices[0].message.content
-    except Exception as e:
-        return f"Groq Error: {str(e)}"
+    if not providers:
+        return "LLM Error: no provider configured (set GROQ_API_KEY or OPENAI_COMPAT_BASE_URL)."
+
+    route = LLM_ROUTES.get(task, LLM_ROUTES["default"])
+    limit = route["max_tokens"] if max_tokens is None else min(max_tokens, route["max_tokens"])
+    full_prompt = f"{prompt}\n\nContext: {context}" if context else prompt
+    messages = [{"role": "user", "content": full_prompt}]
+
+    error = None
+    for provider in _candidates():
+        model = route.get("models", {}).get(provider.name, provider.default_model)
+        try:
+            with timed(f"llm:{task}"):
+                text, usage = provider.complete(messages, model, route["temperature"], limit)
+        except Exception as e:
+            error = e
+            LLM_FAILOVERS.inc(provider=provider.name)
+            print(f"LLM provider {provider.name} failed: {e}")
+            continue
+        record_tokens(usage["prompt_tokens"], usage["completion_tokens"], model=model, task=task)
+        return text
+    return f"LLM Error: {str(error)}"
@@ -0,0 +1,249 @@
+"""
+Lightweight instrumentation for AtlasMind: counters, histograms and stage timers,
+rendered in Prometheus text format. Optionally writes one JSON trace line per request.
+"""
+
+import bisect
+import functools
+import inspect
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from config import METRICS_TRACE_LOG
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+_registry: List["_Metric"] = []
+_trace_spans: ContextVar[Optional[List[Dict]]] = ContextVar("atlasmind_trace_spans", default=None)
+_trace_lock = threading.Lock()
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic counter with optional labels."""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = list(self._values.items())
+        lines += [f"{self.name}{_format_labels(k)} {v}" for k, v in items]
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram with optional labels."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...]):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelKey, List] = {}  # key -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, series):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series[-1]}")
+        return lines
+
+
+# ==================== AtlasMind metrics ====================
+STAGE_SECONDS = Histogram(
+    "atlasmind_stage_duration_seconds",
+    "Time spent in each pipeline stage.",
+    (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+STAGE_ERRORS = Counter("atlasmind_stage_errors_total", "Pipeline stage calls that raised or returned a failed result dict.")
+EMBEDDED_TEXTS = Counter("atlasmind_embedded_texts_total", "Texts passed to the embedding model.")
+FILTERED = Counter("atlasmind_filtered_total", "Boilerplate lines, caption filler and duplicate chunks dropped before embedding.")
+LLM_TOKENS = Counter("atlasmind_llm_tokens_total", "LLM tokens used, by kind (prompt or completion).")
+LLM_FAILOVERS = Counter("atlasmind_llm_failovers_total", "LLM calls that failed on a provider and moved on.")
+SCHEDULER_REJECTIONS = Counter("atlasmind_scheduler_rejections_total", "Requests turned away because a pool queue was full.")
+REQUESTS = Counter("atlasmind_requests_total", "Top-level requests handled, by name.")
+
+
+@contextmanager
+def timed(stage: str):
+    """Time a block into STAGE_SECONDS (and the current request trace, if any)."""
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if failed:
+            STAGE_ERRORS.inc(stage=stage)
+        spans = _trace_spans.get()
+        if spans is not None:
+            spans.append({"stage": stage, "seconds": round(elapsed, 6), "error": failed})
+
+
+def instrument(stage: str):
+    """Decorator form of timed(); also counts {"success": False} results as stage errors."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                result = fn(*args, **kwargs)
+            if isinstance(result, dict) and result.get("success") is False:
+                STAGE_ERRORS.inc(stage=stage)
+            return result
+        return wrapper
+    return decorator
+
+
+def record_tokens(prompt_tokens: int, completion_tokens: int, **labels):
+    LLM_TOKENS.inc(prompt_tokens or 0, kind="prompt", **labels)
+    LLM_TOKENS.inc(completion_tokens or 0, kind="completion", **labels)
+    spans = _trace_spans.get()
+    if spans is not None:
+        spans.append({"stage": "llm_tokens", "prompt": prompt_tokens, "completion": completion_tokens, **labels})
+
+
+def traced(name: str):
+    """
+    Decorator for top-level request handlers: counts the request and, when
+    METRICS_TRACE_LOG is set, writes its stage timings as one JSON line.
+    Works for plain and generator handlers.
+    """
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                REQUESTS.inc(request=name)
+                if not METRICS_TRACE_LOG or _trace_spans.get() is not None:
+                    with timed(f"request:{name}"):
+                        yield from fn(*args, **kwargs)
+                    return
+                spans: List[Dict] = []
+                start = time.perf_counter()
+                steps = fn(*args, **kwargs)
+                try:
+                    while True:
+                        # Gradio may run each step in a different thread and context,
+                        # so the trace is re-attached for every step
+                        token = _trace_spans.set(spans)
+                        try:
+                            item = next(steps)
+                        except StopIteration:
+                            return
+                        finally:
+                            _trace_spans.reset(token)
+                        yield item
+                finally:
+                    steps.close()
+                    _finish_trace(name, spans, time.perf_counter() - start)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            REQUESTS.inc(request=name)
+            if not METRICS_TRACE_LOG or _trace_spans.get() is not None:
+                with timed(f"request:{name}"):
+                    return fn(*args, **kwargs)
+            spans: List[Dict] = []
+            token = _trace_spans.set(spans)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _trace_spans.reset(token)
+                _finish_trace(name, spans, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _finish_trace(name: str, spans: List[Dict], total: float):
+    STAGE_SECONDS.observe(total, stage=f"request:{name}")
+    _write_trace({
+        "trace_id": uuid.uuid4().hex[:16],
+        "request": name,
+        "ts": time.time(),
+        "seconds": round(total, 6),
+        "spans": spans,
+    })
+
+
+def _write_trace(record: Dict):
+    try:
+        line = json.dumps(record, ensure_ascii=False)
+        with _trace_lock, open(METRICS_TRACE_LOG, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    except OSError as e:
+        print(f"Trace log error: {e}")
+
+
+def render_prometheus() -> str:
+    """All registered metrics in Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -1,24 +1,57 @@
 """
 Data models and state management for AtlasMind.
 Separate sessions for Video and PDF so each tab has its own content, notes, and quiz.
+State is kept in the state_store backend so any worker can serve any request.
 """
 
 from typing import Dict, List
 
+from state_store import get_json, set_json, get_text, has_text
+from config import CONVERSATION_TTL
+
 class ContentState:
-    """State for one content source (video or PDF): transcript, vector collection."""
+    """State for one content source (video or PDF): content id, vector collection name, latest notes."""
     def __init__(self):
-        self.transcript = ""
         self.content_id = ""
-        self.collection = None
+        self.collection_name = ""
+        self.notes = ""
 
     def reset(self):
-        self.transcript = ""
         self.content_id = ""
-        self.collection = None
+        self.collection_name = ""
+        self.notes = ""
+
+    @property
+    def transcript(self) -> str:
+        """
+        Full text, read from the shared text store (kept once per content_id, not per
+        session). Each access fetches the whole document: read it once per handler
+        and use is_loaded() for emptiness checks.
+        """
+        return get_text(self.content_id) if self.content_id else ""
 
     def is_loaded(self) -> bool:
-        return bool(self.transcript and self.content_id)
+        """True when a document is selected and its text is actually stored."""
+        return bool(self.content_id) and has_text(self.content_id)
+
+    @property
+    def collection(self):
+        """The Chroma collection, resolved by name from the (possibly shared) vector store."""
+        if not self.collection_name:
+            return None
+        from vector_db import get_collection
+        return get_collection(self.collection_name)
+
+    def to_dict(self) -> Dict:
+        return {"content_id": self.content_id, "collection_name": self.collection_name, "notes": self.notes}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ContentState":
+        state = cls()
+        state.content_id = data.get("content_id", "")
+        state.collection_name = data.get("collection_name", "")
+        state.notes = data.get("notes", "")
+        return state
 
 
 class QuizState:
@@ -48,19 +81,72 @@ class QuizState:
             return 0
         return int((self.score / len(self.questions)) * 100)
 
+    def to_dict(self) -> Dict:
+        return {"questions": self.questions, "current_q": self.current_q, "score": self.score, "answers": self.answers}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "QuizState":
+        state = cls()
+        state.questions = data.get("questions", [])
+        state.current_q = data.get("current_q", 0)
+        state.score = data.get("score", 0)
+        state.answers = data.get("answers", [])
+        return state
+
+
+class ConversationState:
+    """
+    Knowledge Base Q&A memory for one browser session: a rolling summary of older
+    turns plus the recent turns verbatim, for the document the tab had loaded.
+    """
+    def __init__(self, content_id: str = ""):
+        self.content_id = content_id
+        self.summary = ""
+        self.turns: List[Dict] = []  # {"question", "answer"}
 
-# Separate session per content type: active tab shows its own data
-video_session = ContentState()
-pdf_session = ContentState()
-video_quiz_state = QuizState()
-pdf_quiz_state = QuizState()
+    def reset(self):
+        self.summary = ""
+        self.turns = []
 
+    def is_empty(self) -> bool:
+        return not (self.summary or self.turns)
 
+    def to_dict(self) -> Dict:
+        return {"content_id": self.content_id, "summary": self.summary, "turns": self.turns}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ConversationState":
+        state = cls(data.get("content_id", ""))
+        state.summary = data.get("summary", "")
+        state.turns = data.get("turns", [])
+        return state
+
+
+# Separate session per content type: active tab shows its own data.
+# Load with get_*, mutate, then persist with save_*.
 def get_session(source: str) -> ContentState:
     """source is 'video' or 'pdf'."""
-    return video_session if source == "video" else pdf_session
+    return ContentState.from_dict(get_json(f"session:{source}", {}))
+
+
+def save_session(source: str, session: ContentState):
+    set_json(f"session:{source}", session.to_dict())
 
 
 def get_quiz_state(source: str) -> QuizState:
     """source is 'video' or 'pdf'."""
-    return video_quiz_state if source == "video" else pdf_quiz_state
+    return QuizState.from_dict(get_json(f"quiz:{source}", {}))
+
+
+def save_quiz_state(source: str, quiz_state: QuizState):
+    set_json(f"quiz:{source}", quiz_state.to_dict())
+
+
+# Q&A history is per browser session (gr.Request.session_hash), not shared per tab
+def get_conversation(source: str, session_id: str) -> ConversationState:
+    """source is 'video' or 'pdf'."""
+    return ConversationState.from_dict(get_json(f"conversation:{source}:{session_id}", {}))
+
+
+def save_conversation(source: str, session_id: str, conversation: ConversationState):
+    set_json(f"conversation:{source}:{session_id}", conversation.to_dict(), ttl=CONVERSATION_TTL)
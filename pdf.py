@@ -7,6 +7,9 @@ import os
 from pathlib import Path
 from typing import Dict
 
+from dedup import strip_repeated_lines
+from metrics import instrument
+
 try:
     import fitz  # PyMuPDF
     HAS_PYMUPDF = True
@@ -14,6 +17,7 @@ except ImportError:
     HAS_PYMUPDF = False
 
 
+@instrument("pdf_extract")
 def extract_text_from_pdf(file_path: str) -> Dict:
     """
     Extract plain text from a PDF file.
@@ -22,7 +26,8 @@ def extract_text_from_pdf(file_path: str) -> Dict:
         file_path: Path to the PDF file (e.g. from Gradio upload)
 
     Returns:
-        Dict with success status, content_id, and text or error message
+        Dict with success status, content_id, title, text (running headers, footers
+        and page numbers removed) and boilerplate_lines dropped, or error message
     """
     if not HAS_PYMUPDF:
         return {
@@ -41,10 +46,12 @@ def extract_text_from_pdf(file_path: str) -> Dict:
 
     try:
         doc = fitz.open(path)
+        title = ((doc.metadata or {}).get("title") or "").strip() or path.stem
         parts = []
         for page in doc:
             parts.append(page.get_text())
         doc.close()
+        parts, boilerplate_lines = strip_repeated_lines(parts)
         full_text = "\n".join(parts).strip()
     except Exception as e:
         return {"success": False, "error": f"Could not read PDF: {str(e)}"}
@@ -59,5 +66,7 @@ def extract_text_from_pdf(file_path: str) -> Dict:
     return {
         "success": True,
         "content_id": content_id,
+        "title": title,
         "transcript": full_text,
+        "boilerplate_lines": boilerplate_lines,
     }
@@ -2,20 +2,24 @@
 Quiz generation and management. Separate quiz state per source (video / pdf).
 """
 
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 import gradio as gr
-from models import get_session, get_quiz_state
+from models import get_session, get_quiz_state, save_quiz_state
 from llm import ask_groq
-from config import QUIZ_CONTEXT_LENGTH
+from vector_db import select_context
+from metrics import instrument, traced
+from config import QUIZ_CONTEXT_LENGTH, QUIZ_TOKENS_PER_QUESTION
 
 
+@traced("generate_quiz")
 def generate_quiz_data(num_questions: int, source: str) -> Dict:
     """Generate quiz for the given source ('video' or 'pdf')."""
     session = get_session(source)
     quiz_state = get_quiz_state(source)
-    if not session.transcript:
+    if not session.is_loaded():
         return {"success": False, "error": "Process a video or PDF in this tab first."}
 
+    transcript = session.transcript
     prompt = f"""Create {num_questions} multiple choice questions based on this content.
 
 Format EXACTLY like this (use ### as separator):
@@ -31,9 +35,22 @@ EXPLANATION: [2-3 sentence explanation]
 QUESTION: [next question]
 ...
 
-Transcript: {session.transcript[:QUIZ_CONTEXT_LENGTH]}"""
+Transcript: {select_context(transcript, session.collection, QUIZ_CONTEXT_LENGTH)}"""
 
-    response = ask_groq(prompt)
+    response = ask_groq(prompt, task="quiz", max_tokens=QUIZ_TOKENS_PER_QUESTION * int(num_questions))
+    questions = _parse_quiz_response(response)
+
+    if questions:
+        quiz_state.reset()
+        quiz_state.questions = questions
+        save_quiz_state(source, quiz_state)
+        return {"success": True, "count": len(questions)}
+    return {"success": False, "error": "Failed to parse quiz questions."}
+
+
+@instrument("quiz_parse")
+def _parse_quiz_response(response: str) -> List[Dict]:
+    """Parse the ###-separated QUESTION/A-D/CORRECT/EXPLANATION blocks returned by the LLM."""
     questions = []
     for block in response.split("###"):
         if "QUESTION:" not in block:
@@ -60,12 +77,7 @@ Transcript: {session.transcript[:QUIZ_CONTEXT_LENGTH]}"""
                 questions.append(q_data)
         except Exception:
             continue
-
-    if questions:
-        quiz_state.reset()
-        quiz_state.questions = questions
-        return {"success": True, "count": len(questions)}
-    return {"success": False, "error": "Failed to parse quiz questions."}
+    return questions
 
 
 def start_quiz(num_questions: int, source: str) -> Tuple:
@@ -122,6 +134,7 @@ def check_answer(selected_option: str, source: str) -> Tuple:
         "correct_answer": correct_answer,
         "is_correct": is_correct,
     })
+    save_quiz_state(source, quiz_state)
 
     if is_correct:
         feedback = f"## ✅ Correct!\n\n**Explanation:** {q.get('explanation', 'Good job!')}"
@@ -138,7 +151,9 @@ def check_answer(selected_option: str, source: str) -> Tuple:
 
 
 def next_question(source: str) -> Tuple:
-    get_quiz_state(source).current_q += 1
+    quiz_state = get_quiz_state(source)
+    quiz_state.current_q += 1
+    save_quiz_state(source, quiz_state)
     return _show_current_question(source)
 
 
@@ -3,19 +3,79 @@ RAG (Retrieval Augmented Generation) for AtlasMind.
 Separate sessions for Video and PDF; each tab uses its own session.
 """
 
+import re
+import threading
+import time
+from typing import Dict, List
+
 import gradio as gr
-from models import get_session
-from vector_db import semantic_search, store_in_vector_db
+from models import get_session, save_session, get_conversation, save_conversation, ConversationState
+from vector_db import semantic_search, store_in_vector_db, global_collection, build_search_filter, select_context
 from llm import ask_groq
-from config import TRANSCRIPT_PREVIEW_LENGTH
+from singleflight import SingleFlight
+from state_store import store
+from metrics import traced
+from config import (
+    TRANSCRIPT_PREVIEW_LENGTH, TRANSCRIPT_RETRY_ATTEMPTS, TRANSCRIPT_RETRY_BACKOFF, GLOBAL_SEARCH_TOP_K,
+    QA_HISTORY_TOKEN_BUDGET,
+)
+
+# Coalesces identical concurrent fetch / index / summary jobs (e.g. a whole class pasting one link)
+_flights = SingleFlight()
+
+
+def _fetch_video(video_url: str) -> Dict:
+    """fetch_transcript_ytdlp, shared by concurrent requests for the same video."""
+    from youtube import fetch_transcript_ytdlp, parse_youtube_url
+
+    video_id = parse_youtube_url(video_url)
+    if not video_id:
+        return fetch_transcript_ytdlp(video_url)
+    return _flights.do(f"fetch:{video_id}", lambda: fetch_transcript_ytdlp(video_url))
 
 
-def _process_content_text(content_id: str, transcript: str, source_label: str, source: str) -> str:
+def _index_content(content_id: str, transcript: str, source: str, title: str = "", course: str = ""):
+    """store_in_vector_db, shared by concurrent requests for the same content_id."""
+    return _flights.do(
+        f"index:{content_id}",
+        lambda: store_in_vector_db(content_id, transcript, title, source_type=source, course=course),
+    )
+
+
+@traced("ingest")
+def _process_content_text(
+    content_id: str, transcript: str, source_label: str, source: str, title: str = "", course: str = ""
+) -> str:
     """Store text in vector DB, set session state, generate summary. source is 'video' or 'pdf'."""
+    collection, summary = _flights.do(
+        f"ingest:{content_id}", lambda: _index_and_summarize(content_id, transcript, source, title, course)
+    )
+    if collection is None:
+        # The session keeps its previous document; nothing usable was stored for this one
+        return f"**{source_label} error:** Could not index the content. Please try again."
+    _switch_content(source, content_id, collection)
+    return f"""**{source_label} Processed Successfully!**
+
+---
+
+{summary}"""
+
+
+def _switch_content(source: str, content_id: str, collection):
+    """Point the tab's session at content_id (conversations on the old document lapse)."""
     session = get_session(source)
-    session.transcript = transcript
+    if session.content_id != content_id:
+        session.notes = ""
     session.content_id = content_id
-    session.collection = store_in_vector_db(content_id, transcript)
+    session.collection_name = collection.name if collection is not None else ""
+    save_session(source, session)
+
+
+def _index_and_summarize(content_id: str, transcript: str, source: str, title: str, course: str) -> tuple:
+    """Embed the content and generate its summary once. Returns (collection, summary)."""
+    collection = _index_content(content_id, transcript, source, title, course)
+    if collection is None:
+        return None, ""
 
     print("Generating AI summary...")
     prompt = f"""You are AtlasMind, an AI learning companion.
@@ -31,54 +91,149 @@ A concise 3-4 sentence overview.
 ## 💡 Takeaways
 3-5 actionable insights.
 
-Content: {transcript[:TRANSCRIPT_PREVIEW_LENGTH]}"""
+Content: {select_context(transcript, collection, TRANSCRIPT_PREVIEW_LENGTH)}"""
 
-    summary = ask_groq(prompt)
+    summary = ask_groq(prompt, task="summary")
     print("Summary generated!")
-    return f"""**{source_label} Processed Successfully!**
-
----
+    return collection, summary
 
-{summary}"""
 
+@traced("process_video")
+def process_video(video_url: str, course: str = "", progress=gr.Progress()):
+    """Process a YouTube video, playlist or channel URL for the Video tab. Updates video_session.
 
-def process_video(video_url: str, progress=gr.Progress()) -> str:
-    """Process YouTube URL for the Video tab. Updates video_session."""
+    Yields markdown so playlist progress can stream to the UI.
+    """
     try:
-        from youtube import fetch_transcript_ytdlp
-        from config import GROQ_API_KEY
+        from youtube import is_youtube_collection_url
+        from llm import providers
 
-        if not GROQ_API_KEY:
-            return "**Configuration error:** `GROQ_API_KEY` is not set."
+        if not providers:
+            yield "**Configuration error:** `GROQ_API_KEY` (or `OPENAI_COMPAT_BASE_URL`) is not set."
+            return
         video_url = (video_url or "").strip()
+        course = (course or "").strip()
         if not video_url:
-            return "Please enter a YouTube URL."
+            yield "Please enter a YouTube URL."
+            return
+
+        if is_youtube_collection_url(video_url):
+            yield from _process_video_collection(video_url, course, progress)
+            return
 
         progress(0, desc="Fetching video...")
-        result = fetch_transcript_ytdlp(video_url)
+        result = _fetch_video(video_url)
         if not result["success"]:
-            return f"**Video error:** {result['error']}"
+            yield f"**Video error:** {result['error']}"
+            return
 
         progress(0.5, desc="Generating summary...")
         out = _process_content_text(
-            result["video_id"], result["transcript"], "Video", "video"
+            result["video_id"], result["transcript"], "Video", "video", result.get("title", ""), course
         )
         progress(1.0, desc="Done!")
-        return out
+        yield out
     except Exception as e:
         import traceback
         print(traceback.format_exc())
-        return f"**Error:** {str(e)}"
-
-
-def process_pdf(pdf_file, progress=gr.Progress()) -> str:
+        yield f"**Error:** {str(e)}"
+
+
+def _playlist_report(title: str, total: int, indexed: List[Dict], failed: List[Dict], done: bool) -> str:
+    lines = [f"**{title}** — {len(indexed) + len(failed)}/{total} videos fetched, {len(indexed)} indexed", ""]
+    for entry in indexed:
+        lines.append(f"- ✅ {entry['title']} (`{entry['video_id']}`)")
+    for entry in failed:
+        lines.append(f"- ⏳ {entry['title']} (`{entry['video_id']}`): {entry['error']}")
+    if done:
+        lines.append("")
+        if failed:
+            lines.append(f"{len(failed)} failed video(s) will be retried in the background.")
+        if indexed:
+            lines.append(
+                f"The Q&A, notes and quiz tabs now use **{indexed[0]['title']}**. "
+                "Paste any other video URL from this list to study it; it is already indexed."
+            )
+    return "\n".join(lines)
+
+
+def _process_video_collection(url: str, course: str, progress):
+    """Enumerate a playlist/channel, fetch transcripts concurrently and index each video."""
+    from youtube import list_collection_videos, fetch_transcripts_concurrent
+
+    progress(0, desc="Listing videos...")
+    listing = list_collection_videos(url)
+    if not listing["success"]:
+        yield f"**Playlist error:** {listing['error']}"
+        return
+
+    entries = listing["entries"]
+    titles = {e["video_id"]: e["title"] for e in entries}
+    indexed, failed = [], []
+    first = None
+    yield _playlist_report(listing["title"], len(entries), indexed, failed, done=False)
+
+    # Embedding runs here while the remaining fetches continue in the pool
+    for result in fetch_transcripts_concurrent([e["video_id"] for e in entries]):
+        video_id = result["video_id"]
+        entry = {"video_id": video_id, "title": titles.get(video_id, video_id)}
+        collection = (
+            _index_content(video_id, result["transcript"], "video", entry["title"], course)
+            if result["success"] else None
+        )
+        if collection is not None:
+            indexed.append(entry)
+            if first is None:
+                first = (video_id, collection)
+        else:
+            failed.append({**entry, "error": result.get("error", "Could not index transcript.")})
+        progress((len(indexed) + len(failed)) / len(entries), desc="Fetching transcripts...")
+        yield _playlist_report(listing["title"], len(entries), indexed, failed, done=False)
+
+    if first is not None:
+        _switch_content("video", *first)
+    if failed:
+        _retry_in_background({f["video_id"]: f["title"] for f in failed}, course)
+    progress(1.0, desc="Done!")
+    yield _playlist_report(listing["title"], len(entries), indexed, failed, done=True)
+
+
+def _retry_in_background(titles: Dict[str, str], course: str):
+    """Retry failed transcript fetches (video_id -> title) with exponential backoff on a daemon thread."""
+    from youtube import fetch_transcripts_concurrent
+
+    def run():
+        remaining = list(titles)
+        delay = TRANSCRIPT_RETRY_BACKOFF
+        for attempt in range(TRANSCRIPT_RETRY_ATTEMPTS):
+            time.sleep(delay)
+            delay *= 2
+            still_failing = []
+            for result in fetch_transcripts_concurrent(remaining):
+                video_id = result["video_id"]
+                if result["success"] and _index_content(
+                    video_id, result["transcript"], "video", titles.get(video_id, ""), course
+                ) is not None:
+                    print(f"Background retry indexed {video_id}")
+                else:
+                    still_failing.append(video_id)
+            remaining = still_failing
+            if not remaining:
+                return
+        print(f"Giving up on {len(remaining)} video(s) after {TRANSCRIPT_RETRY_ATTEMPTS} retries: {remaining}")
+
+    threading.Thread(target=run, name="transcript-retry", daemon=True).start()
+
+
+@traced("process_pdf")
+def process_pdf(pdf_file, course: str = "", progress=gr.Progress()) -> str:
     """Process uploaded PDF for the PDF tab. Updates pdf_session."""
     try:
         from pdf import extract_text_from_pdf
-        from config import GROQ_API_KEY
+        from llm import providers
 
-        if not GROQ_API_KEY:
-            return "**Configuration error:** `GROQ_API_KEY` is not set."
+        if not providers:
+            return "**Configuration error:** `GROQ_API_KEY` (or `OPENAI_COMPAT_BASE_URL`) is not set."
         pdf_path = None
         if pdf_file is not None:
             if isinstance(pdf_file, list) and len(pdf_file) > 0:
@@ -95,10 +250,12 @@ def process_pdf(pdf_file, progress=gr.Progress()) -> str:
         result = extract_text_from_pdf(pdf_path)
         if not result["success"]:
             return f"**PDF error:** {result['error']}"
+        if result.get("boilerplate_lines"):
+            print(f"Removed {result['boilerplate_lines']} repeated header/footer lines")
 
         progress(0.5, desc="Generating summary...")
         out = _process_content_text(
-            result["content_id"], result["transcript"], "PDF", "pdf"
+            result["content_id"], result["transcript"], "PDF", "pdf", result["title"], (course or "").strip()
         )
         progress(1.0, desc="Done!")
         return out
@@ -108,31 +265,174 @@ def process_pdf(pdf_file, progress=gr.Progress()) -> str:
         return f"**Error:** {str(e)}"
 
 
-def answer_question(question: str, source: str) -> str:
-    """Answer using the session for the given source ('video' or 'pdf')."""
+# Follow-ups that lean on earlier turns ("explain that again", "give an example of it")
+_FOLLOW_UP_RE = re.compile(
+    r"\b(it|its|that|this|these|those|they|them|again|more|above|previous|earlier|same|example|elaborate|continue)\b",
+    re.IGNORECASE,
+)
+# Conversations with a background summary update in flight (source:session_id)
+_compressing = set()
+_compressing_lock = threading.Lock()
+
+
+@traced("answer_question")
+def answer_question(question: str, source: str, search_all: bool = False, course: str = "", session_id: str = "") -> str:
+    """Answer using the session for the given source ('video' or 'pdf').
+
+    With search_all, retrieve from the global index over all ingested content
+    instead, optionally restricted to one course tag. Earlier turns of this
+    browser session (session_id) are remembered: follow-ups are rewritten into
+    standalone questions for retrieval, and the prompt carries a bounded history.
+    """
     session = get_session(source)
-    if not session.transcript:
+    if not search_all and not session.is_loaded():
         return "Process a video or PDF in this tab first."
     if not (question or "").strip():
         return "Please enter a question."
 
-    context = semantic_search(question, session.collection)
+    conversation = _load_conversation(source, session_id, session.content_id)
+    query = _standalone_question(question, conversation)
+    if search_all:
+        where = build_search_filter(course=(course or "").strip())
+        context = semantic_search(query, global_collection, top_k=GLOBAL_SEARCH_TOP_K, where=where)
+        if not context:
+            return "No ingested content matches this search yet."
+    else:
+        context = semantic_search(query, session.collection)
     if not context:
         context = session.transcript[:3000]
+    history = _format_history(conversation)
+    history_block = f"\nConversation so far:\n{history}\n" if history else ""
     prompt = f"""Based on this content (lecture or document), answer the question clearly and concisely.
-
+{history_block}
 Question: {question}
 
 Provide a helpful answer."""
-    return ask_groq(prompt, context)
-
-
-def generate_notes(source: str) -> tuple:
-    """Generate notes for the given source. Returns (notes_markdown, file_path or None)."""
+    answer = ask_groq(prompt, context, task="qa")
+    if not answer.startswith("LLM Error"):
+        _remember_turn(source, session_id, session.content_id, question, answer)
+    return answer
+
+
+def clear_conversation(source: str, session_id: str = "") -> str:
+    """Forget this browser session's Q&A history for the given source."""
+    save_conversation(source, session_id, ConversationState(get_session(source).content_id))
+    return ""
+
+
+def _load_conversation(source: str, session_id: str, content_id: str) -> ConversationState:
+    conversation = get_conversation(source, session_id)
+    if conversation.content_id != content_id:
+        # The tab has moved on to another document: start over
+        return ConversationState(content_id)
+    return conversation
+
+
+def _remember_turn(source: str, session_id: str, content_id: str, question: str, answer: str):
+    with store.lock(f"conversation:{source}:{session_id}"):
+        conversation = _load_conversation(source, session_id, content_id)
+        conversation.turns.append({"question": question, "answer": answer})
+        save_conversation(source, session_id, conversation)
+    if _estimate_tokens(_format_turns(conversation.turns)) > QA_HISTORY_TOKEN_BUDGET:
+        _compress_in_background(source, session_id, content_id)
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _format_turns(turns: List[Dict]) -> str:
+    return "\n\n".join(f"Q: {t['question']}\nA: {t['answer']}" for t in turns)
+
+
+def _format_history(conversation: ConversationState) -> str:
+    """The rolling summary plus the newest turns that fit QA_HISTORY_TOKEN_BUDGET."""
+    recent: List[Dict] = []
+    for turn in reversed(conversation.turns):
+        if recent and _estimate_tokens(_format_turns([turn] + recent)) > QA_HISTORY_TOKEN_BUDGET:
+            break
+        recent.insert(0, turn)
+    lines = [f"(Earlier) {conversation.summary}"] if conversation.summary else []
+    if recent:
+        lines.append(_format_turns(recent))
+    return "\n\n".join(lines)
+
+
+def _standalone_question(question: str, conversation: ConversationState) -> str:
+    """Rewrite a follow-up ("explain that with an example") into a self-contained search query."""
+    if conversation.is_empty() or not _FOLLOW_UP_RE.search(question):
+        return question
+    prompt = f"""Rewrite the follow-up question so it can be understood without the conversation.
+Keep it short. Reply with the rewritten question only.
+
+Conversation:
+{_format_history(conversation)}
+
+Follow-up question: {question}"""
+    rewritten = ask_groq(prompt, task="rewrite").strip()
+    return question if not rewritten or rewritten.startswith("LLM Error") else rewritten
+
+
+def _compress_in_background(source: str, session_id: str, content_id: str):
+    """Run _compress_history on a daemon thread, at most once at a time per conversation."""
+    key = f"{source}:{session_id}"
+    with _compressing_lock:
+        if key in _compressing:
+            return
+        _compressing.add(key)
+
+    def run():
+        try:
+            _compress_history(source, session_id, content_id)
+        except Exception as e:
+            print(f"Conversation summary error: {e}")
+        finally:
+            with _compressing_lock:
+                _compressing.discard(key)
+
+    threading.Thread(target=run, name="qa-memory", daemon=True).start()
+
+
+def _compress_history(source: str, session_id: str, content_id: str):
+    """
+    Fold the oldest turns into the rolling summary until the recent turns use at
+    most half of QA_HISTORY_TOKEN_BUDGET, so this runs only every few turns. If
+    the LLM call fails the turns are kept and folded after a later answer.
+    """
+    conversation = _load_conversation(source, session_id, content_id)
+    turns = list(conversation.turns)
+    folded = []
+    while len(turns) > 1 and _estimate_tokens(_format_turns(turns)) > QA_HISTORY_TOKEN_BUDGET // 2:
+        folded.append(turns.pop(0))
+    if not folded:
+        return
+    prompt = f"""Update the summary of a study conversation with the new turns.
+Keep the topics asked about and the key facts given. Reply with the summary only, under 150 words.
+
+Current summary: {conversation.summary or "(none)"}
+
+New turns:
+{_format_turns(folded)}"""
+    summary = ask_groq(prompt, task="memory")
+    if summary.startswith("LLM Error"):
+        return
+    with store.lock(f"conversation:{source}:{session_id}"):
+        latest = _load_conversation(source, session_id, content_id)
+        if latest.summary != conversation.summary or latest.turns[:len(folded)] != folded:
+            return  # cleared or compressed elsewhere meanwhile
+        latest.summary = summary.strip()
+        latest.turns = latest.turns[len(folded):]
+        save_conversation(source, session_id, latest)
+
+
+@traced("generate_notes")
+def generate_notes(source: str) -> str:
+    """Generate notes for the given source; they are kept on the session for export_notes."""
     session = get_session(source)
-    if not session.transcript:
-        return ("Process a video or PDF in this tab first.", None)
+    if not session.is_loaded():
+        return "Process a video or PDF in this tab first."
 
+    transcript = session.transcript
     prompt = f"""Create DETAILED study notes from this content (lecture or document). Aim for about 1.5 pages of a Word document.
 
 Rules:
@@ -141,43 +441,19 @@ Rules:
 - Cover main concepts in depth.
 
 Content:
-{session.transcript[:6000]}"""
+{select_context(transcript, session.collection, 6000)}"""
 
-    notes = ask_groq(prompt)
-    file_path = None
-    try:
-        file_path = _notes_to_docx(notes)
-    except Exception as e:
-        print(f"Could not save notes: {e}")
-    return (notes, file_path)
+    notes = ask_groq(prompt, task="notes")
+    if not notes.startswith("LLM Error"):
+        session = get_session(source)
+        session.notes = notes
+        save_session(source, session)
+    return notes
 
 
-def _notes_to_docx(markdown_text: str):
-    import os
-    import tempfile
-    try:
-        from docx import Document
-    except ImportError:
-        raise ImportError("pip install python-docx")
-
-    doc = Document()
-    lines = markdown_text.replace("\r\n", "\n").split("\n")
-    for line in lines:
-        stripped = line.strip()
-        if not stripped:
-            continue
-        if stripped.startswith("###"):
-            doc.add_heading(stripped.lstrip("#").strip(), level=2)
-        elif stripped.startswith("##"):
-            doc.add_heading(stripped.lstrip("#").strip(), level=1)
-        elif stripped.startswith("#"):
-            doc.add_heading(stripped.lstrip("#").strip(), level=1)
-        elif stripped.startswith("- ") or stripped.startswith("* "):
-            doc.add_paragraph(stripped[2:].strip(), style="List Bullet")
-        else:
-            doc.add_paragraph(stripped)
+def export_notes(source: str, fmt: str = "docx"):
+    """Render the latest notes for the given source ('docx', 'md' or 'pdf'). Returns a file path or None."""
+    from exports import export_notes as render_export
 
-    fd, path = tempfile.mkstemp(suffix=".docx", prefix="atlasmind_notes_")
-    os.close(fd)
-    doc.save(path)
-    return path
+    notes = get_session(source).notes
+    return render_export(notes, fmt) if notes else None
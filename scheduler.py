@@ -0,0 +1,125 @@
+"""
+Request scheduling and admission control for the Gradio app.
+
+Each event class (ingestion, LLM generation) runs in its own bounded pool so
+long PDF ingestions cannot starve Q&A. Waiting callers are admitted by
+priority (interactive before bulk), part of each wait queue is reserved for
+interactive callers so queued bulk work cannot lock Q&A out, and a full wait
+queue rejects immediately with a clear message instead of letting latency grow
+without bound.
+"""
+
+import functools
+import heapq
+import inspect
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import gradio as gr
+from config import SCHEDULER_POOLS
+from metrics import SCHEDULER_REJECTIONS, timed
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+
+
+class QueueFull(Exception):
+    """Raised when a pool's wait queue is at its limit."""
+
+
+class PriorityPool:
+    """
+    At most `concurrency` holders at once; up to `max_waiting` callers queue by
+    priority, FIFO within one. Bulk callers may fill only
+    max_waiting - interactive_reserve of the queue.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_waiting: int, interactive_reserve: int = 0):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_waiting = max_waiting
+        self.interactive_reserve = min(interactive_reserve, max_waiting)
+        self._active = 0
+        self._waiting: List[Tuple[int, int]] = []
+        self._bulk_waiting = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _queue_full(self, priority: int) -> bool:
+        if len(self._waiting) >= self.max_waiting:
+            return True
+        return priority > PRIORITY_INTERACTIVE and self._bulk_waiting >= self.max_waiting - self.interactive_reserve
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_INTERACTIVE):
+        with self._cond:
+            if self._active >= self.concurrency or self._waiting:
+                if self._queue_full(priority):
+                    raise QueueFull(self.name)
+                bulk = priority > PRIORITY_INTERACTIVE
+                ticket = (priority, next(self._seq))
+                heapq.heappush(self._waiting, ticket)
+                self._bulk_waiting += bulk
+                with timed(f"queue_wait:{self.name}"):
+                    while self._active >= self.concurrency or self._waiting[0] != ticket:
+                        self._cond.wait()
+                heapq.heappop(self._waiting)
+                self._bulk_waiting -= bulk
+                if self._active + 1 < self.concurrency and self._waiting:
+                    # Several slots may have freed at once; wake the next waiter for the rest
+                    self._cond.notify_all()
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def depth(self) -> Dict[str, int]:
+        with self._cond:
+            return {"active": self._active, "waiting": len(self._waiting)}
+
+
+pools: Dict[str, PriorityPool] = {
+    name: PriorityPool(name, spec["concurrency"], spec["max_waiting"], spec.get("interactive_reserve", 0))
+    for name, spec in SCHEDULER_POOLS.items()
+}
+
+
+def _busy(pool: str) -> gr.Error:
+    SCHEDULER_REJECTIONS.inc(pool=pool)
+    what = "processing uploads" if pool == "ingest" else "answering other requests"
+    return gr.Error(f"AtlasMind is busy {what} right now. Please try again in a minute.")
+
+
+def scheduled(pool: str, priority: int = PRIORITY_INTERACTIVE):
+    """
+    Decorator running a Gradio handler inside a pool slot. Works for plain
+    and generator handlers; the wrapped signature is kept so gr.Progress
+    injection still works.
+    """
+    target = pools[pool]
+
+    def decorator(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                try:
+                    with target.slot(priority):
+                        yield from fn(*args, **kwargs)
+                except QueueFull:
+                    raise _busy(pool)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                with target.slot(priority):
+                    return fn(*args, **kwargs)
+            except QueueFull:
+                raise _busy(pool)
+        return wrapper
+    return decorator
@@ -0,0 +1,54 @@
+"""
+Single-flight request coalescing for AtlasMind.
+Concurrent calls with the same key share one execution and its result.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving meanwhile wait for it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """
+        Run fn for key, or attach to the call already in flight for key.
+
+        Args:
+            key: Coalescing key (e.g. "ingest:<content_id>")
+            fn: Zero-argument callable doing the actual work
+
+        Returns:
+            fn's result; exceptions raised by fn propagate to every waiting caller
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
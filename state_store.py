@@ -0,0 +1,173 @@
+"""
+Key-value state backend for AtlasMind.
+
+Session, quiz and document-index state lives here instead of in module
+globals, so any worker on any node can serve any request. The default
+in-process MemoryStore suits a single process (and tests); set
+STATE_BACKEND_URL=redis://host:6379/0 to share state across workers and nodes.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import STATE_BACKEND_URL, STATE_LOCK_TIMEOUT, TEXT_PAGE_CHARS
+
+
+class MemoryStore:
+    """Process-local dict-backed store (single worker, tests)."""
+
+    def __init__(self):
+        self._data: Dict[str, str] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._named_locks: Dict[str, list] = {}  # name -> [lock, holders + waiters]
+        self._ttl_writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        expires = self._expires.get(key)
+        if expires is not None and expires < time.time():
+            self.delete(key)
+            return None
+        return self._data.get(key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        return [self.get(k) for k in keys]
+
+    def exists(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None):
+        self._data[key] = value
+        if ttl is None:
+            self._expires.pop(key, None)
+            return
+        self._expires[key] = time.time() + ttl
+        self._ttl_writes += 1
+        if self._ttl_writes % 1000 == 0:
+            # Expired keys that are never read again would otherwise stay forever
+            now = time.time()
+            self.delete(*[k for k, t in list(self._expires.items()) if t < now])
+
+    def set_many(self, mapping: Dict[str, str]):
+        self._data.update(mapping)
+        for key in mapping:
+            self._expires.pop(key, None)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    @contextmanager
+    def lock(self, name: str):
+        with self._lock:
+            entry = self._named_locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            # Drop the lock once nobody holds or waits for it (one name per browser session)
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._named_locks[name]
+
+
+class RedisStore:
+    """Redis-backed store shared by all workers and nodes."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("Redis state backend not installed. Install with: pip install redis")
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(key)
+
+    def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        return self.client.mget(keys) if keys else []
+
+    def exists(self, key: str) -> bool:
+        return bool(self.client.exists(key))
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None):
+        self.client.set(key, value, ex=ttl)
+
+    def set_many(self, mapping: Dict[str, str]):
+        if mapping:
+            self.client.mset(mapping)
+
+    def delete(self, *keys: str):
+        if keys:
+            self.client.delete(*keys)
+
+    @contextmanager
+    def lock(self, name: str):
+        with self.client.lock(f"lock:{name}", timeout=STATE_LOCK_TIMEOUT, blocking_timeout=STATE_LOCK_TIMEOUT):
+            yield
+
+
+def _build_store():
+    if STATE_BACKEND_URL.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(STATE_BACKEND_URL)
+    return MemoryStore()
+
+
+store = _build_store()
+
+
+def get_json(key: str, default: Any = None) -> Any:
+    raw = store.get(key)
+    return default if raw is None else json.loads(raw)
+
+
+def set_json(key: str, value: Any, ttl: Optional[int] = None):
+    """Store value as JSON; with ttl (seconds) the key expires."""
+    store.set(key, json.dumps(value), ttl)
+
+
+def _page_keys(content_id: str, pages) -> List[str]:
+    return [f"text:{content_id}:{k}" for k in pages]
+
+
+def get_text(content_id: str) -> str:
+    """The full text of an ingested document (the single copy chunks point into)."""
+    pages = store.get(f"textpages:{content_id}")
+    if pages is None:
+        return ""
+    return "".join(page or "" for page in store.get_many(_page_keys(content_id, range(int(pages)))))
+
+
+def get_text_ranges(content_id: str, ranges: List[Tuple[int, int]]) -> List[str]:
+    """text[start:end] for each (start, end) range, fetching only the pages those ranges touch."""
+    spans = [(start // TEXT_PAGE_CHARS, max(start, end - 1) // TEXT_PAGE_CHARS) for start, end in ranges]
+    needed = sorted({k for first, last in spans for k in range(first, last + 1)})
+    pages = dict(zip(needed, store.get_many(_page_keys(content_id, needed))))
+    parts = []
+    for (start, end), (first, last) in zip(ranges, spans):
+        joined = "".join(pages[k] or "" for k in range(first, last + 1))
+        offset = first * TEXT_PAGE_CHARS
+        parts.append(joined[start - offset:end - offset])
+    return parts
+
+
+def has_text(content_id: str) -> bool:
+    """Whether the document's text is stored, without fetching it."""
+    return store.exists(f"textpages:{content_id}")
+
+
+def set_text(content_id: str, text: str):
+    old_pages = int(store.get(f"textpages:{content_id}") or 0)
+    pages = [text[i:i + TEXT_PAGE_CHARS] for i in range(0, len(text), TEXT_PAGE_CHARS)] or [""]
+    store.set_many({
+        **dict(zip(_page_keys(content_id, range(len(pages))), pages)),
+        f"textpages:{content_id}": str(len(pages)),
+    })
+    if old_pages > len(pages):
+        store.delete(*_page_keys(content_id, range(len(pages), old_pages)))
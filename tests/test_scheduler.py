@@ -0,0 +1,86 @@
+"""
+Tests for scheduler.PriorityPool admission. Run with: python -m unittest discover tests
+"""
+
+import threading
+import time
+import unittest
+from contextlib import ExitStack
+
+from scheduler import PriorityPool, QueueFull, PRIORITY_BULK, PRIORITY_INTERACTIVE
+
+
+def _wait_for(predicate, timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+class PriorityPoolTest(unittest.TestCase):
+    def _start_waiter(self, pool: PriorityPool, priority: int, admitted: list, release: threading.Event):
+        def run():
+            try:
+                with pool.slot(priority):
+                    admitted.append(priority)
+                    release.wait(5)
+            except QueueFull:
+                admitted.append("rejected")
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def test_slots_freed_together_admit_every_waiter(self):
+        pool = PriorityPool("test", concurrency=2, max_waiting=4)
+        admitted, release = [], threading.Event()
+        with ExitStack() as holders:
+            holders.enter_context(pool.slot())
+            holders.enter_context(pool.slot())
+            waiters = [self._start_waiter(pool, PRIORITY_INTERACTIVE, admitted, release) for _ in range(2)]
+            self.assertTrue(_wait_for(lambda: pool.depth()["waiting"] == 2))
+            # Free both slots before either waiter can run (the condition's lock is reentrant)
+            with pool._cond:
+                holders.close()
+        self.assertTrue(_wait_for(lambda: len(admitted) == 2), f"admitted: {admitted}")
+        release.set()
+        for thread in waiters:
+            thread.join(2)
+        self.assertEqual(pool.depth(), {"active": 0, "waiting": 0})
+
+    def test_interactive_admitted_before_bulk(self):
+        pool = PriorityPool("test", concurrency=1, max_waiting=4)
+        admitted, release = [], threading.Event()
+        release.set()
+        with pool.slot():
+            bulk = self._start_waiter(pool, PRIORITY_BULK, admitted, release)
+            self.assertTrue(_wait_for(lambda: pool.depth()["waiting"] == 1))
+            interactive = self._start_waiter(pool, PRIORITY_INTERACTIVE, admitted, release)
+            self.assertTrue(_wait_for(lambda: pool.depth()["waiting"] == 2))
+        bulk.join(2)
+        interactive.join(2)
+        self.assertEqual(admitted, [PRIORITY_INTERACTIVE, PRIORITY_BULK])
+
+    def test_reserved_places_only_admit_interactive(self):
+        pool = PriorityPool("test", concurrency=1, max_waiting=3, interactive_reserve=1)
+        admitted, release = [], threading.Event()
+        with pool.slot():
+            threads = [self._start_waiter(pool, PRIORITY_BULK, admitted, release) for _ in range(2)]
+            self.assertTrue(_wait_for(lambda: pool.depth()["waiting"] == 2))
+            with self.assertRaises(QueueFull):
+                with pool.slot(PRIORITY_BULK):
+                    pass
+            threads.append(self._start_waiter(pool, PRIORITY_INTERACTIVE, admitted, release))
+            self.assertTrue(_wait_for(lambda: pool.depth()["waiting"] == 3))
+            with self.assertRaises(QueueFull):
+                with pool.slot(PRIORITY_INTERACTIVE):
+                    pass
+            release.set()
+        for thread in threads:
+            thread.join(2)
+        self.assertEqual(sorted(admitted), [PRIORITY_INTERACTIVE, PRIORITY_BULK, PRIORITY_BULK])
+
+
+if __name__ == "__main__":
+    unittest.main()
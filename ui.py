@@ -3,9 +3,11 @@ AtlasMind – Tab-based UI: Video and PDF each have their own session, summary,
 """
 
 import gradio as gr
-from rag import process_video, process_pdf, answer_question, generate_notes
+from rag import process_video, process_pdf, answer_question, clear_conversation, generate_notes, export_notes
+from models import get_session
 from quiz import start_quiz, check_answer, next_question
-from config import APP_TITLE, APP_DESCRIPTION
+from scheduler import scheduled, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from config import APP_TITLE, APP_DESCRIPTION, EXPORT_CONCURRENCY
 
 CUSTOM_CSS = """
 .gradio-container { max-width: 1000px !important; margin: auto !important; padding-top: 40px !important; }
@@ -26,11 +28,42 @@ input:focus, textarea:focus { border-color: #a855f7 !important; box-shadow: 0 0
 """
 
 
-def _notes_with_download(source: str):
-    notes, path = generate_notes(source)
+EXPORT_CHOICES = [("Word (.docx)", "docx"), ("Markdown (.md)", "md"), ("PDF", "pdf")]
+
+
+def _notes_with_export(source: str):
+    """Generate notes; files are only rendered when the user clicks Export."""
+    notes = generate_notes(source)
+    return notes, gr.update(visible=bool(get_session(source).notes)), gr.update(visible=False)
+
+
+def _ask_handler(source: str):
+    """Ask-button handler for a tab; Gradio passes the request, whose session_hash keys the Q&A history."""
+    def handler(question: str, search_all: bool, course: str, request: gr.Request):
+        return _answer_question(question, source, search_all, course, session_id=request.session_hash or "")
+    return handler
+
+
+def _clear_handler(source: str):
+    def handler(request: gr.Request):
+        return clear_conversation(source, request.session_hash or "")
+    return handler
+
+
+def _export_notes(source: str, fmt: str):
+    path = export_notes(source, fmt)
     if path:
-        return notes, gr.update(value=path, visible=True)
-    return notes, gr.update(visible=False)
+        return gr.update(value=path, visible=True)
+    return gr.update(visible=False)
+
+
+# Scheduled handlers: these events run with concurrency_limit=None in Gradio and
+# are bounded by the scheduler pools instead (see config.SCHEDULER_POOLS).
+_process_video = scheduled("ingest", PRIORITY_BULK)(process_video)
+_process_pdf = scheduled("ingest", PRIORITY_BULK)(process_pdf)
+_answer_question = scheduled("llm", PRIORITY_INTERACTIVE)(answer_question)
+_generate_notes = scheduled("llm", PRIORITY_BULK)(_notes_with_export)
+_start_quiz = scheduled("llm", PRIORITY_BULK)(start_quiz)
 
 
 def create_ui():
@@ -47,7 +80,8 @@ def create_ui():
             with gr.Tab("Video", id="video_tab"):
                 with gr.Column(elem_classes="card-wrapper"):
                     gr.Markdown("### **YouTube Video**")
-                    video_input = gr.Textbox(placeholder="Enter YouTube lecture URL...", show_label=False, container=False)
+                    video_input = gr.Textbox(placeholder="Enter YouTube lecture, playlist or channel URL...", show_label=False, container=False)
+                    video_course = gr.Textbox(placeholder="Course tag (optional, e.g. CS101)", show_label=False, container=False)
                     video_process_btn = gr.Button("Process Video", variant="primary", elem_classes="primary-btn")
                     video_summary = gr.Markdown(label="Summary")
 
@@ -55,13 +89,21 @@ def create_ui():
                     with gr.Tab("Knowledge Base"):
                         with gr.Column(elem_classes="card-wrapper"):
                             video_question = gr.Textbox(placeholder="Ask about this video...", lines=2, label="Question")
-                            video_ask_btn = gr.Button("Ask", variant="primary", elem_classes="primary-btn")
+                            with gr.Row():
+                                video_search_all = gr.Checkbox(label="Search all ingested content", value=False)
+                                video_search_course = gr.Textbox(placeholder="Only this course tag (optional)", show_label=False, container=False)
+                            with gr.Row():
+                                video_ask_btn = gr.Button("Ask", variant="primary", elem_classes="primary-btn")
+                                video_clear_btn = gr.Button("Clear Conversation")
                             video_answer = gr.Markdown(label="Answer")
                     with gr.Tab("Study Notes"):
                         with gr.Column(elem_classes="card-wrapper"):
                             video_notes_btn = gr.Button("Generate Notes", variant="primary", elem_classes="primary-btn")
                             video_notes = gr.Markdown()
-                            video_notes_download = gr.DownloadButton("Download Notes", visible=False)
+                            with gr.Row():
+                                video_notes_format = gr.Radio(choices=EXPORT_CHOICES, value="docx", show_label=False)
+                                video_export_btn = gr.Button("Export Notes", visible=False)
+                                video_notes_download = gr.DownloadButton("Download Notes", visible=False)
                     with gr.Tab("Assessment"):
                         with gr.Column(elem_classes="card-wrapper"):
                             video_num_q = gr.Slider(5, 15, value=5, step=1, label="Number of questions")
@@ -78,6 +120,7 @@ def create_ui():
                 with gr.Column(elem_classes="card-wrapper"):
                     gr.Markdown("### **PDF Document**")
                     pdf_input = gr.File(label="Upload PDF", file_types=[".pdf"], type="filepath")
+                    pdf_course = gr.Textbox(placeholder="Course tag (optional, e.g. CS101)", show_label=False, container=False)
                     pdf_process_btn = gr.Button("Process PDF", variant="primary", elem_classes="primary-btn")
                     pdf_summary = gr.Markdown(label="Summary")
 
@@ -85,13 +128,21 @@ def create_ui():
                     with gr.Tab("Knowledge Base"):
                         with gr.Column(elem_classes="card-wrapper"):
                             pdf_question = gr.Textbox(placeholder="Ask about this document...", lines=2, label="Question")
-                            pdf_ask_btn = gr.Button("Ask", variant="primary", elem_classes="primary-btn")
+                            with gr.Row():
+                                pdf_search_all = gr.Checkbox(label="Search all ingested content", value=False)
+                                pdf_search_course = gr.Textbox(placeholder="Only this course tag (optional)", show_label=False, container=False)
+                            with gr.Row():
+                                pdf_ask_btn = gr.Button("Ask", variant="primary", elem_classes="primary-btn")
+                                pdf_clear_btn = gr.Button("Clear Conversation")
                             pdf_answer = gr.Markdown(label="Answer")
                     with gr.Tab("Study Notes"):
                         with gr.Column(elem_classes="card-wrapper"):
                             pdf_notes_btn = gr.Button("Generate Notes", variant="primary", elem_classes="primary-btn")
                             pdf_notes = gr.Markdown()
-                            pdf_notes_download = gr.DownloadButton("Download Notes", visible=False)
+                            with gr.Row():
+                                pdf_notes_format = gr.Radio(choices=EXPORT_CHOICES, value="docx", show_label=False)
+                                pdf_export_btn = gr.Button("Export Notes", visible=False)
+                                pdf_notes_download = gr.DownloadButton("Download Notes", visible=False)
                     with gr.Tab("Assessment"):
                         with gr.Column(elem_classes="card-wrapper"):
                             pdf_num_q = gr.Slider(5, 15, value=5, step=1, label="Number of questions")
@@ -106,43 +157,87 @@ def create_ui():
         gr.HTML('<div class="footer-text">RAG • Groq • ChromaDB</div>')
 
         # ---- Video tab events (source="video") ----
-        video_process_btn.click(process_video, inputs=[video_input], outputs=video_summary)
-        video_ask_btn.click(lambda q: answer_question(q, "video"), inputs=[video_question], outputs=video_answer)
-        video_notes_btn.click(lambda: _notes_with_download("video"), inputs=None, outputs=[video_notes, video_notes_download])
+        video_process_btn.click(_process_video, inputs=[video_input, video_course], outputs=video_summary, concurrency_limit=None)
+        video_ask_btn.click(
+            _ask_handler("video"),
+            inputs=[video_question, video_search_all, video_search_course],
+            outputs=video_answer,
+            concurrency_limit=None,
+        )
+        video_clear_btn.click(_clear_handler("video"), inputs=None, outputs=video_answer, queue=False)
+        video_notes_btn.click(
+            lambda: _generate_notes("video"),
+            inputs=None,
+            outputs=[video_notes, video_export_btn, video_notes_download],
+            concurrency_limit=None,
+        )
+        video_export_btn.click(
+            lambda fmt: _export_notes("video", fmt),
+            inputs=[video_notes_format],
+            outputs=video_notes_download,
+            concurrency_limit=EXPORT_CONCURRENCY,
+            concurrency_id="notes_export",
+        )
+        video_notes_format.change(lambda: gr.update(visible=False), inputs=None, outputs=video_notes_download, queue=False)
         video_start_quiz_btn.click(
-            lambda n: start_quiz(n, "video"),
+            lambda n: _start_quiz(n, "video"),
             inputs=[video_num_q],
             outputs=[video_quiz_question, video_quiz_options, video_submit_btn, video_next_btn, video_quiz_feedback],
+            concurrency_limit=None,
         )
         video_submit_btn.click(
             lambda opt: check_answer(opt, "video"),
             inputs=[video_quiz_options],
             outputs=[video_quiz_question, video_quiz_options, video_submit_btn, video_next_btn, video_quiz_feedback],
+            queue=False,
         )
         video_next_btn.click(
             lambda: next_question("video"),
             inputs=None,
             outputs=[video_quiz_question, video_quiz_options, video_submit_btn, video_next_btn, video_quiz_feedback],
+            queue=False,
         )
 
         # ---- PDF tab events (source="pdf") ----
-        pdf_process_btn.click(process_pdf, inputs=[pdf_input], outputs=pdf_summary)
-        pdf_ask_btn.click(lambda q: answer_question(q, "pdf"), inputs=[pdf_question], outputs=pdf_answer)
-        pdf_notes_btn.click(lambda: _notes_with_download("pdf"), inputs=None, outputs=[pdf_notes, pdf_notes_download])
+        pdf_process_btn.click(_process_pdf, inputs=[pdf_input, pdf_course], outputs=pdf_summary, concurrency_limit=None)
+        pdf_ask_btn.click(
+            _ask_handler("pdf"),
+            inputs=[pdf_question, pdf_search_all, pdf_search_course],
+            outputs=pdf_answer,
+            concurrency_limit=None,
+        )
+        pdf_clear_btn.click(_clear_handler("pdf"), inputs=None, outputs=pdf_answer, queue=False)
+        pdf_notes_btn.click(
+            lambda: _generate_notes("pdf"),
+            inputs=None,
+            outputs=[pdf_notes, pdf_export_btn, pdf_notes_download],
+            concurrency_limit=None,
+        )
+        pdf_export_btn.click(
+            lambda fmt: _export_notes("pdf", fmt),
+            inputs=[pdf_notes_format],
+            outputs=pdf_notes_download,
+            concurrency_limit=EXPORT_CONCURRENCY,
+            concurrency_id="notes_export",
+        )
+        pdf_notes_format.change(lambda: gr.update(visible=False), inputs=None, outputs=pdf_notes_download, queue=False)
         pdf_start_quiz_btn.click(
-            lambda n: start_quiz(n, "pdf"),
+            lambda n: _start_quiz(n, "pdf"),
             inputs=[pdf_num_q],
             outputs=[pdf_quiz_question, pdf_quiz_options, pdf_submit_btn, pdf_next_btn, pdf_quiz_feedback],
+            concurrency_limit=None,
         )
         pdf_submit_btn.click(
             lambda opt: check_answer(opt, "pdf"),
             inputs=[pdf_quiz_options],
             outputs=[pdf_quiz_question, pdf_quiz_options, pdf_submit_btn, pdf_next_btn, pdf_quiz_feedback],
+            queue=False,
         )
         pdf_next_btn.click(
             lambda: next_question("pdf"),
             inputs=None,
             outputs=[pdf_quiz_question, pdf_quiz_options, pdf_submit_btn, pdf_next_btn, pdf_quiz_feedback],
+            queue=False,
         )
 
     return demo
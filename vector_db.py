@@ -2,86 +2,516 @@
 Vector database operations using ChromaDB
 """
 
-from typing import List
+import hashlib
+import re
+import zlib
+from array import array
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
 import chromadb
-from sentence_transformers import SentenceTransformer
-from config import CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_MODEL
+import numpy as np
+from dedup import near_duplicates
+from metrics import FILTERED, EMBEDDED_TEXTS, instrument, timed
+from state_store import store, get_json, set_json, get_text_ranges, set_text
+from config import (
+    CHUNK_SIZE, CHUNK_OVERLAP, EMBEDDING_SERVICE_SOCKET, REINDEX_MIN_OVERLAP,
+    GLOBAL_COLLECTION_NAME, CHROMA_HOST, CHROMA_PORT, EMBED_BATCH_SIZE, CONTEXT_SELECTION_DIVERSITY,
+)
 
-# Initialize clients
-chroma_client = chromadb.Client()
-embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+# Initialize clients: a shared Chroma server when configured, else in-process
+if CHROMA_HOST:
+    chroma_client = chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT)
+else:
+    chroma_client = chromadb.Client()
+if EMBEDDING_SERVICE_SOCKET:
+    # Shared out-of-process model: this worker never loads torch
+    from embedding_service import RemoteEncoder
+    embedding_model = RemoteEncoder(EMBEDDING_SERVICE_SOCKET)
+else:
+    from embedding_service import load_local_model
+    embedding_model = load_local_model()
+
+# Every chunk of every document, tagged with metadata, behind one HNSW (ANN) index
+global_collection = chroma_client.get_or_create_collection(
+    GLOBAL_COLLECTION_NAME, metadata={"hnsw:space": "cosine"}
+)
+
+_WORD_RE = re.compile(r"\S+\s*")
+# Chunk cuts hash a window of words: a single (often common) word is a poor anchor
+_CHUNK_HASH_WINDOW = 4
+_ROLL_BASE = 0x01000193
+
+# Ingested documents are recorded in the state store, for linking a new version to
+# the one it revises: doc:<content_id> -> {"title", "ids"}, title:<title> -> latest
+# content_id, chunk:<chunk id> -> latest content_id containing it.
+
+
+def get_collection(name: str):
+    """Look up a collection by name, or None if it does not exist."""
+    try:
+        return chroma_client.get_collection(name)
+    except Exception:
+        return None
+
+
+def _chunk_bounds(text: str, chunk_size: int = CHUNK_SIZE) -> List[Tuple[int, int]]:
+    """
+    Content-defined chunk boundaries as (start, end) offsets.
+
+    A chunk ends after a word where a rolling hash over the last
+    _CHUNK_HASH_WINDOW words hits a fixed pattern, once it is at least half of
+    chunk_size, and never grows past 1.5x chunk_size. Boundaries depend only on
+    nearby words, so an edit moves only the chunks around it.
+    """
+    min_size = chunk_size // 2
+    max_size = chunk_size + chunk_size // 2
+    # Measured on lecture text and API docs: mean chunk 0.9-1.0x chunk_size, under 8% of cuts at max_size
+    divisor = max(1, chunk_size // 15)
+    backup_divisor = max(1, divisor // 4)
+    drop = pow(_ROLL_BASE, _CHUNK_HASH_WINDOW - 1, 1 << 32)
+    window: List[int] = []
+    rolling = 0
+    bounds = []
+    start = 0
+    backup = -1  # last weaker (content-defined) cut point, used instead of a blind cut at max_size
+    for match in _WORD_RE.finditer(text):
+        if match.end() - start > max_size and match.start() > start:
+            cut = backup if backup > start else match.start()
+            bounds.append((start, cut))
+            start = cut
+        while match.end() - start > max_size:
+            bounds.append((start, start + max_size))
+            start += max_size
+        word_hash = zlib.crc32(match.group().rstrip().encode("utf-8"))
+        window.append(word_hash)
+        if len(window) > _CHUNK_HASH_WINDOW:
+            rolling = (rolling - window.pop(0) * drop) & 0xFFFFFFFF
+        rolling = (rolling * _ROLL_BASE + word_hash) & 0xFFFFFFFF
+        end = match.end()
+        # Mix before taking the modulus so every bit of the window hash counts
+        mixed = ((rolling * 0x9E3779B1) & 0xFFFFFFFF) >> 8
+        if end - start >= min_size:
+            if mixed % divisor == 0:
+                bounds.append((start, end))
+                start = end
+            elif mixed % backup_divisor == 0:
+                backup = end
+    if start < len(text):
+        bounds.append((start, len(text)))
+    return bounds
+
+
+class ChunkSpans:
+    """
+    Chunk boundaries as parallel (start, end) offset arrays into one stored text.
+    Chunk strings are only materialized when needed (hashing, embedding, prompts).
+    """
+    __slots__ = ("starts", "ends")
+
+    def __init__(self):
+        self.starts = array("L")
+        self.ends = array("L")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def append(self, start: int, end: int):
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def text(self, text: str, i: int) -> str:
+        return text[self.starts[i]:self.ends[i]]
+
+    def without(self, dropped: Set[int]) -> "ChunkSpans":
+        kept = ChunkSpans()
+        for i in range(len(self)):
+            if i not in dropped:
+                kept.append(self.starts[i], self.ends[i])
+        return kept
+
+
+def _drop_near_duplicates(text: str, spans: ChunkSpans) -> ChunkSpans:
+    """Drop chunks that repeat an earlier chunk (boilerplate pages, repeated slides) before embedding."""
+    with timed("dedup"):
+        dropped = near_duplicates(spans.text(text, i) for i in range(len(spans)))
+    if not dropped:
+        return spans
+    FILTERED.inc(len(dropped), kind="near_duplicate_chunk")
+    print(f"Dropped {len(dropped)} near-duplicate chunks")
+    return spans.without(dropped)
+
+
+@instrument("chunk")
+def chunk_spans(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> ChunkSpans:
+    """Content-defined, overlapping chunk offsets for text (see chunk_text)."""
+    spans = ChunkSpans()
+    for start, end in _chunk_bounds(text, chunk_size):
+        spans.append(max(0, start - overlap), end)
+    return spans
 
 
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVERLAP) -> List[str]:
     """
-    Split text into overlapping chunks
+    Split text into overlapping chunks with content-defined boundaries
     
     Args:
         text: Text to chunk
-        chunk_size: Size of each chunk
-        overlap: Overlap between chunks
+        chunk_size: Target size of each chunk
+        overlap: Characters of the preceding text repeated at the start of each chunk
     
     Returns:
         List of text chunks
     """
-    chunks = []
-    start = 0
-    while start < len(text):
-        chunks.append(text[start:start + chunk_size])
-        start += chunk_size - overlap
-    return chunks
+    spans = chunk_spans(text, chunk_size, overlap)
+    return [spans.text(text, i) for i in range(len(spans))]
+
+
+def encode(texts: List[str]) -> List[List[float]]:
+    """Embed texts with the sentence-transformer model (local or the shared embedding service)."""
+    EMBEDDED_TEXTS.inc(len(texts))
+    with timed("embed"):
+        return embedding_model.encode(texts).tolist()
+
+
+def _encode_spans(text: str, spans: ChunkSpans, indices: List[int]) -> List[List[float]]:
+    """Embed the given chunks, materializing only one batch of chunk strings at a time."""
+    embeddings: List[List[float]] = []
+    for i in range(0, len(indices), EMBED_BATCH_SIZE):
+        embeddings.extend(encode([spans.text(text, j) for j in indices[i:i + EMBED_BATCH_SIZE]]))
+    return embeddings
+
+
+def _chunk_ids(text: str, spans: ChunkSpans) -> List[str]:
+    """Stable ids derived from chunk content; repeated chunks get an occurrence suffix."""
+    seen: Counter = Counter()
+    ids = []
+    for i in range(len(spans)):
+        digest = hashlib.sha1(spans.text(text, i).encode("utf-8")).hexdigest()[:16]
+        ids.append(digest if not seen[digest] else f"{digest}_{seen[digest]}")
+        seen[digest] += 1
+    return ids
+
+
+def _span_metadata(content_id: str, spans: ChunkSpans, i: int) -> Dict:
+    return {"content_id": content_id, "start": spans.starts[i], "end": spans.ends[i]}
 
 
-def store_in_vector_db(content_id: str, text: str):
+def _find_previous_version(content_id: str, title: str, ids: List[str]) -> Optional[str]:
+    """
+    Find an ingested document that this one revises: the same content_id, the
+    same title, or the document sharing most chunks (at least REINDEX_MIN_OVERLAP).
+    """
+    if store.get(f"doc:{content_id}") is not None:
+        return content_id
+    if title:
+        owner = store.get(f"title:{title}")
+        if owner and store.get(f"doc:{owner}") is not None:
+            return owner
+    votes = Counter(o for o in store.get_many([f"chunk:{i}" for i in ids]) if o)
+    for candidate, _ in votes.most_common(1):
+        doc = get_json(f"doc:{candidate}")
+        if not doc:
+            continue
+        old_ids = set(doc["ids"])
+        new_ids = set(ids)
+        if len(old_ids & new_ids) / len(old_ids | new_ids) >= REINDEX_MIN_OVERLAP:
+            return candidate
+    return None
+
+
+def _register_document(content_id: str, title: str, ids: Set[str]):
+    set_json(f"doc:{content_id}", {"title": title, "ids": sorted(ids)})
+    if title:
+        store.set(f"title:{title}", content_id)
+    store.set_many({f"chunk:{chunk_id}": content_id for chunk_id in ids})
+
+
+def _collection_ids(content_id: Optional[str]) -> Set[str]:
+    """Chunk ids currently in a document's collection (empty if there is none)."""
+    collection = get_collection(f"content_{content_id}") if content_id else None
+    return set(collection.get(include=[])["ids"]) if collection is not None else set()
+
+
+def _embed_missing(text: str, spans: ChunkSpans, ids: List[str], have: Set[str], embedded: Dict[str, List[float]]):
+    """Embed the chunks that are neither in have nor already in embedded (chunk id -> vector)."""
+    missing = [i for i, chunk_id in enumerate(ids) if chunk_id not in have and chunk_id not in embedded]
+    if missing:
+        embedded.update(zip((ids[i] for i in missing), _encode_spans(text, spans, missing)))
+
+
+def _write_collection(
+    previous: Optional[str], collection_name: str, content_id: str, spans: ChunkSpans, ids: List[str],
+    embedded: Dict[str, List[float]],
+):
+    """
+    Build collection_name from precomputed vectors (chunk id -> embedding) and,
+    when revising a previous version, its vectors for unchanged chunks.
+    Re-ingesting the same content_id updates its collection in place (removed
+    chunks are deleted); otherwise the previous version is left intact for
+    sessions still using it.
+    """
+    source = get_collection(f"content_{previous}") if previous else None
+    existing = set(source.get(include=[])["ids"]) if source is not None else set()
+    position = {chunk_id: i for i, chunk_id in enumerate(ids)}
+    reused = [i for i in existing if i in position]
+
+    if source is not None and source.name == collection_name:
+        target = source
+        removed = list(existing - set(position))
+        if removed:
+            target.delete(ids=removed)
+        if reused:
+            # Unchanged chunks may have moved within the text
+            target.update(ids=reused, metadatas=[_span_metadata(content_id, spans, position[i]) for i in reused])
+    else:
+        try:
+            chroma_client.delete_collection(collection_name)
+        except Exception:
+            pass
+        target = chroma_client.create_collection(collection_name)
+        if reused:
+            kept = source.get(ids=reused, include=["embeddings"])
+            target.add(
+                ids=kept["ids"],
+                embeddings=kept["embeddings"],
+                metadatas=[_span_metadata(content_id, spans, position[i]) for i in kept["ids"]],
+            )
+
+    added = [i for i, chunk_id in enumerate(ids) if chunk_id not in existing]
+    if added:
+        with timed("chroma_add"):
+            target.add(
+                embeddings=[embedded[ids[i]] for i in added],
+                metadatas=[_span_metadata(content_id, spans, i) for i in added],
+                ids=[ids[i] for i in added],
+            )
+    if source is not None:
+        print(f"Re-indexed {collection_name} from content_{previous}: "
+              f"{len(added)} embedded, {len(existing) - len(reused)} dropped, {len(reused)} reused")
+    return target
+
+
+def _sync_global_index(content_id: str, collection, metadata: Dict[str, str]):
+    """Mirror a content collection into the global index, copying only vectors it lacks."""
+    prefix = f"{content_id}:"
+    current = collection.get(include=["metadatas"])
+    expected = {
+        i: {**metadata, "start": m["start"], "end": m["end"]}
+        for i, m in zip(current["ids"], current["metadatas"])
+    }
+    indexed = global_collection.get(where={"content_id": content_id}, include=["metadatas"])
+    have = {i[len(prefix):]: m for i, m in zip(indexed["ids"], indexed["metadatas"])}
+
+    stale = [prefix + i for i in set(have) - set(expected)]
+    if stale:
+        global_collection.delete(ids=stale)
+    missing = [i for i in expected if i not in have]
+    if missing:
+        got = collection.get(ids=missing, include=["embeddings"])
+        global_collection.add(
+            ids=[prefix + i for i in got["ids"]],
+            embeddings=got["embeddings"],
+            metadatas=[expected[i] for i in got["ids"]],
+        )
+    changed = [i for i in expected if i in have and have[i] != expected[i]]
+    if changed:
+        global_collection.update(ids=[prefix + i for i in changed], metadatas=[expected[i] for i in changed])
+
+
+def _drop_from_global_index(content_ids: Set[str]):
+    """Remove superseded versions from the global index; their own collections stay for open sessions."""
+    for content_id in content_ids:
+        global_collection.delete(where={"content_id": content_id})
+        print(f"Removed superseded content_{content_id} from the global index")
+
+
+def build_search_filter(source_type: str = "", content_ids: Optional[List[str]] = None, course: str = "") -> Optional[Dict]:
+    """
+    Build a metadata filter for searching the global index.
+
+    Args:
+        source_type: 'video' or 'pdf' (empty for both)
+        content_ids: Restrict to these documents (None for all)
+        course: Course tag (empty for any)
+
+    Returns:
+        ChromaDB where-filter, or None for no filtering
+    """
+    clauses = []
+    if source_type:
+        clauses.append({"source_type": source_type})
+    if content_ids:
+        clauses.append({"content_id": {"$in": list(content_ids)}})
+    if course:
+        clauses.append({"course": course})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def store_in_vector_db(content_id: str, text: str, title: str = "", source_type: str = "", course: str = ""):
     """
     Store text chunks in ChromaDB (works for video transcript or PDF content).
 
+    If the text revises an already-ingested document (same content_id, same
+    title, or mostly the same chunks), only added or changed chunks are embedded;
+    vectors of unchanged chunks are reused. Chunks are also mirrored into the
+    global index, tagged with source_type, content_id, title and course; the
+    version this one replaces is removed from it.
+    Chunks that nearly duplicate an earlier chunk are dropped before embedding.
+
     Args:
         content_id: Unique id (e.g. YouTube video_id or pdf_<hash>)
         text: Full text to chunk and embed
+        title: Optional document title (e.g. PDF filename), also used to link versions
+        source_type: 'video' or 'pdf'
+        course: Optional course tag for filtering global searches
 
     Returns:
         ChromaDB collection object or None if failed
     """
     try:
         collection_name = f"content_{content_id}"
-        try:
-            chroma_client.delete_collection(collection_name)
-        except:
-            pass
-        collection = chroma_client.create_collection(collection_name)
-
-        chunks = chunk_text(text)
-        embeddings = embedding_model.encode(chunks).tolist()
-        collection.add(
-            embeddings=embeddings,
-            documents=chunks,
-            ids=[f"chunk_{i}" for i in range(len(chunks))]
-        )
-        print(f"Stored {len(chunks)} chunks in vector DB")
+        spans = _drop_near_duplicates(text, chunk_spans(text))
+        ids = _chunk_ids(text, spans)
+        version_key = f"{source_type}:{title}" if title else ""
+        metadata = {"source_type": source_type, "content_id": content_id, "title": title or content_id, "course": course}
+
+        # Embed outside the lock: it can take minutes and must not outlive a shared lock's timeout
+        embedded: Dict[str, List[float]] = {}
+        _embed_missing(text, spans, ids, _collection_ids(_find_previous_version(content_id, version_key, ids)), embedded)
+
+        # Serialize writers of this content_id across workers; other versions are only read
+        with store.lock(f"index:{content_id}"):
+            previous = _find_previous_version(content_id, version_key, ids)
+            # Older versions this one replaces (a new content_id, or the title's latest version)
+            superseded = {previous, store.get(f"title:{version_key}") if version_key else None} - {content_id, None}
+            # Another worker may have changed the previous version meanwhile
+            _embed_missing(text, spans, ids, _collection_ids(previous), embedded)
+            # The text is stored once; chunks are offsets into it
+            set_text(content_id, text)
+            collection = _write_collection(previous, collection_name, content_id, spans, ids, embedded)
+            _register_document(content_id, version_key, set(ids))
+            _sync_global_index(content_id, collection, metadata)
+            _drop_from_global_index(superseded)
+        if not previous:
+            print(f"Stored {len(spans)} chunks in vector DB")
         return collection
     except Exception as e:
         print(f"Vector DB error: {e}")
         return None
 
 
-def semantic_search(query: str, collection, top_k: int = 3) -> str:
+def _centrality(embeddings: np.ndarray, iterations: int = 30, damping: float = 0.85) -> np.ndarray:
+    """TextRank-style scores: power iteration over the positive cosine-similarity graph."""
+    sim = np.clip(embeddings @ embeddings.T, 0.0, None)
+    np.fill_diagonal(sim, 0.0)
+    sim /= np.maximum(sim.sum(axis=1, keepdims=True), 1e-9)
+    n = len(sim)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        scores = (1 - damping) / n + damping * (sim.T @ scores)
+    return scores
+
+
+@instrument("select_context")
+def select_context(text: str, collection, budget: int) -> str:
+    """
+    Pick the most representative chunks of a document for a fixed-size prompt.
+
+    Uses the chunk embeddings already in the collection: chunks are ranked by
+    centrality with an MMR penalty for redundancy, then packed in document order
+    until budget characters are used. Falls back to the text prefix when the
+    text already fits or the collection has no embeddings.
+
+    Args:
+        text: Full document text (chunk metadata holds offsets into it)
+        collection: The document's ChromaDB collection
+        budget: Maximum characters of context
+
+    Returns:
+        Context string of at most budget characters
+    """
+    if len(text) <= budget or not collection:
+        return text[:budget]
+    try:
+        data = collection.get(include=["embeddings", "metadatas"])
+        metadatas = data["metadatas"] or []
+        if len(metadatas) < 2:
+            return text[:budget]
+        vectors = np.asarray(data["embeddings"], dtype=np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+    except Exception as e:
+        print(f"Context selection error: {e}")
+        return text[:budget]
+
+    scores = _centrality(vectors)
+    scores /= scores.max()
+    lengths = np.array([m["end"] - m["start"] for m in metadatas])
+    redundancy = np.zeros(len(metadatas), dtype=np.float32)
+    available = np.ones(len(metadatas), dtype=bool)
+    chosen, used = [], 0
+    while available.any():
+        mmr = np.where(available, (1 - CONTEXT_SELECTION_DIVERSITY) * scores - CONTEXT_SELECTION_DIVERSITY * redundancy, -np.inf)
+        best = int(np.argmax(mmr))
+        available[best] = False
+        if used + lengths[best] > budget:
+            continue
+        chosen.append(best)
+        used += lengths[best]
+        redundancy = np.maximum(redundancy, vectors @ vectors[best])
+        available &= lengths <= budget - used
+
+    # Document order; adjacent chunks overlap, so only add what the previous one did not cover
+    parts, covered = [], -1
+    for start, end in sorted((metadatas[i]["start"], metadatas[i]["end"]) for i in chosen):
+        if start < covered:
+            start = covered
+        elif parts:
+            parts.append("\n...\n")
+        parts.append(text[start:end])
+        covered = max(covered, end)
+    return "".join(parts)[:budget]
+
+
+def semantic_search(query: str, collection, top_k: int = 3, where: Optional[Dict] = None) -> str:
     """
     Search for relevant chunks using semantic similarity
     
     Args:
         query: Search query
-        collection: ChromaDB collection
+        collection: ChromaDB collection (a content collection or global_collection)
         top_k: Number of top results to return
+        where: Optional metadata filter (see build_search_filter)
     
     Returns:
-        Concatenated relevant text chunks
+        Concatenated relevant text chunks; chunks from the global index are
+        prefixed with their document title
     """
     if not collection:
         return ""
     try:
-        query_embedding = embedding_model.encode([query]).tolist()
-        results = collection.query(query_embeddings=query_embedding, n_results=top_k)
-        return "\n".join(results['documents'][0])
+        query_embedding = encode([query])
+        with timed("chroma_query"):
+            results = collection.query(
+                query_embeddings=query_embedding, n_results=top_k, where=where,
+                include=["documents", "metadatas"],
+            )
+        documents = list(results["documents"][0])
+        metadatas = (results.get("metadatas") or [[]])[0] or [None] * len(documents)
+        # Materialize hits from their stored text, fetching only the pages they cover
+        hits: Dict[str, List[int]] = defaultdict(list)
+        for i, (doc, meta) in enumerate(zip(documents, metadatas)):
+            if doc is None and meta:
+                hits[meta["content_id"]].append(i)
+        for content_id, indices in hits.items():
+            ranges = [(metadatas[i]["start"], metadatas[i]["end"]) for i in indices]
+            for i, doc in zip(indices, get_text_ranges(content_id, ranges)):
+                documents[i] = doc
+        parts = []
+        for doc, meta in zip(documents, metadatas):
+            if doc:
+                parts.append(f"[{meta['title']}] {doc}" if meta and meta.get("title") else doc)
+        return "\n".join(parts)
     except:
         return ""
@@ -1,6 +1,7 @@
 """
 YouTube transcript fetching using yt-dlp (library: CLI or Python API).
-Uses Python API when possible to avoid subprocess; falls back to CLI for compatibility.
+Prefers an in-memory path (extract_info + direct caption download, no temp files);
+falls back to the file-based Python API and then the CLI for compatibility.
 """
 
 import json
@@ -8,7 +9,21 @@ import os
 import re
 import subprocess
 import tempfile
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from dedup import strip_caption_filler
+from metrics import instrument
+from config import (
+    CAPTION_HTTP_TIMEOUT, CAPTION_LANGS, CAPTION_FORMATS,
+    PLAYLIST_MAX_VIDEOS, TRANSCRIPT_FETCH_CONCURRENCY, YOUTUBE_POLITENESS_DELAY,
+)
+
+# Shared HTTP client so caption downloads reuse pooled connections
+_http_client = None
 
 def parse_youtube_url(url: str) -> Optional[str]:
     """Extract video ID from YouTube URL or return None."""
@@ -25,6 +40,115 @@ def parse_youtube_url(url: str) -> Optional[str]:
     return None
 
 
+def is_youtube_collection_url(url: str) -> bool:
+    """True for playlist or channel URLs (as opposed to a single video)."""
+    url = (url or "").strip()
+    if not url:
+        return False
+    if re.search(r"[?&]list=", url) and not re.search(r"[?&]v=", url):
+        return True
+    return bool(re.search(r"youtube\.com/(?:playlist\b|@[^/?#]+|channel/|c/|user/)", url))
+
+
+def list_collection_videos(url: str, limit: int = PLAYLIST_MAX_VIDEOS) -> Dict:
+    """
+    Enumerate the videos of a playlist or channel with yt-dlp (metadata only).
+
+    Returns:
+        Dict with success, title and entries ([{"video_id", "title"}]) or error
+    """
+    try:
+        import yt_dlp
+    except ImportError:
+        return {"success": False, "error": "yt-dlp not available. Install with: pip install yt-dlp"}
+
+    url = url.strip()
+    # A bare channel URL lists its tabs; ask for the uploads tab instead
+    if re.search(r"youtube\.com/(?:@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+)/?$", url):
+        url = url.rstrip("/") + "/videos"
+
+    opts = {
+        "extract_flat": "in_playlist",
+        "playlistend": limit,
+        "skip_download": True,
+        "quiet": True,
+        "no_warnings": True,
+    }
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+    except Exception as e:
+        return {"success": False, "error": f"Could not read playlist: {str(e)}"}
+
+    entries = []
+    seen = set()
+    pending = list((info or {}).get("entries") or [])
+    while pending and len(entries) < limit:
+        entry = pending.pop(0)
+        if not entry:
+            continue
+        # Channel pages nest their tabs (Videos, Shorts, ...) as sub-playlists
+        if entry.get("_type") == "playlist" and entry.get("entries"):
+            pending = list(entry["entries"]) + pending
+            continue
+        video_id = entry.get("id") if len(entry.get("id") or "") == 11 else parse_youtube_url(entry.get("url", ""))
+        if video_id and video_id not in seen:
+            seen.add(video_id)
+            entries.append({"video_id": video_id, "title": entry.get("title") or video_id})
+
+    if not entries:
+        return {"success": False, "error": "No videos found at this URL."}
+    return {"success": True, "title": (info or {}).get("title") or "Playlist", "entries": entries}
+
+
+class _HostThrottle:
+    """Spaces out requests to the same host by a minimum delay, across threads."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, host: str):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_youtube_throttle = _HostThrottle(YOUTUBE_POLITENESS_DELAY)
+
+
+def fetch_transcripts_concurrent(
+    video_ids: List[str],
+    max_workers: int = TRANSCRIPT_FETCH_CONCURRENCY,
+) -> Iterator[Dict]:
+    """
+    Fetch transcripts for many videos with at most max_workers in flight,
+    spacing requests to YouTube by YOUTUBE_POLITENESS_DELAY.
+
+    Yields:
+        One result dict per video (as returned by fetch_transcript_ytdlp, always
+        carrying video_id) in completion order
+    """
+    def fetch(video_id: str) -> Dict:
+        url = f"https://www.youtube.com/watch?v={video_id}"
+        _youtube_throttle.wait(urlparse(url).netloc)
+        try:
+            result = fetch_transcript_ytdlp(url)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        result.setdefault("video_id", video_id)
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [pool.submit(fetch, video_id) for video_id in video_ids]
+        for future in as_completed(futures):
+            yield future.result()
+
+
 def _transcript_from_json3(data: dict) -> str:
     """Extract plain text from json3 subtitle data."""
     parts = []
@@ -33,7 +157,112 @@ def _transcript_from_json3(data: dict) -> str:
             text = seg.get("utf8", "").strip()
             if text:
                 parts.append(text)
-    return " ".join(parts).strip()
+    return strip_caption_filler(" ".join(parts))
+
+
+def _transcript_from_vtt(text: str) -> str:
+    """Extract plain text from WebVTT subtitle data (drops timings, tags and rolling repeats)."""
+    parts = []
+    for line in text.replace("\r\n", "\n").split("\n"):
+        line = line.strip()
+        if not line or "-->" in line or line.isdigit():
+            continue
+        if line.startswith(("WEBVTT", "Kind:", "Language:", "NOTE", "STYLE", "REGION")):
+            continue
+        line = re.sub(r"<[^>]+>", "", line).strip()
+        # Auto-captions repeat the previous cue line while the next one scrolls in
+        if line and (not parts or parts[-1] != line):
+            parts.append(line)
+    return strip_caption_filler(" ".join(parts))
+
+
+def _get_http_client():
+    global _http_client
+    if _http_client is None:
+        import httpx
+        _http_client = httpx.Client(timeout=CAPTION_HTTP_TIMEOUT, follow_redirects=True)
+    return _http_client
+
+
+def _extract_info(video_id: str) -> Optional[Dict]:
+    """Return yt-dlp metadata for a video without downloading anything, or None."""
+    try:
+        import yt_dlp
+    except ImportError:
+        return None
+
+    opts = {
+        "skip_download": True,
+        "quiet": True,
+        "no_warnings": True,
+    }
+    try:
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            return ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+    except Exception:
+        return None
+
+
+def _pick_caption_track(info: Dict) -> Optional[Dict]:
+    """
+    Choose the best English caption track from yt-dlp metadata.
+
+    Manual subtitles beat automatic captions, an exact language match beats a
+    regional variant (en-US, en-GB, ...), and json3 beats vtt.
+    """
+    def lang_rank(lang: str) -> Optional[int]:
+        for i, wanted in enumerate(CAPTION_LANGS):
+            if lang == wanted:
+                return i
+        if lang.split("-")[0] in CAPTION_LANGS:
+            return len(CAPTION_LANGS)
+        return None
+
+    candidates = []
+    for source_rank, key in enumerate(("subtitles", "automatic_captions")):
+        for lang, tracks in (info.get(key) or {}).items():
+            rank = lang_rank(lang)
+            if rank is None:
+                continue
+            for track in tracks or []:
+                ext = track.get("ext")
+                if ext in CAPTION_FORMATS and track.get("url"):
+                    candidates.append(((source_rank, rank, CAPTION_FORMATS.index(ext)), track))
+    if not candidates:
+        return None
+    candidates.sort(key=lambda c: c[0])
+    return candidates[0][1]
+
+
+def _download_caption(track: Dict) -> str:
+    """Download a caption track into memory and return its plain text."""
+    response = _get_http_client().get(track["url"])
+    response.raise_for_status()
+    if track.get("ext") == "json3":
+        return _transcript_from_json3(response.json())
+    return _transcript_from_vtt(response.text)
+
+
+def _fetch_in_memory(video_id: str, info: Optional[Dict] = None) -> Optional[Dict]:
+    """
+    Get transcript via extract_info and a direct caption download.
+    Returns result dict, or None when the other fetch paths are worth trying.
+    """
+    if info is None:
+        info = _extract_info(video_id)
+    if not info:
+        return None
+    track = _pick_caption_track(info)
+    if not track:
+        # The metadata is authoritative: the file-based and CLI paths would find nothing either
+        return {"success": False, "error": "No captions found for this video."}
+    try:
+        text = _download_caption(track)
+    except Exception:
+        return None
+    if not text:
+        return None
+    return {"success": True, "video_id": video_id, "title": info.get("title", ""), "transcript": text}
 
 
 def _fetch_via_python_api(video_id: str) -> Optional[Dict]:
@@ -138,9 +367,11 @@ def _fetch_via_cli(video_url: str, video_id: str) -> Dict:
         return {"success": False, "error": str(e)}
 
 
+@instrument("youtube_fetch")
 def fetch_transcript_ytdlp(video_url: str) -> Dict:
     """
-    Fetch transcript using yt-dlp. Tries Python API first, then CLI.
+    Fetch transcript using yt-dlp. Tries the in-memory path first, then the
+    file-based Python API, then CLI.
     Returns dict with success, video_id, transcript or error.
     """
     video_id = parse_youtube_url(video_url)
@@ -149,7 +380,14 @@ def fetch_transcript_ytdlp(video_url: str) -> Dict:
 
     print(f"Fetching transcript: {video_id}")
 
-    # Prefer Python API (no subprocess)
+    # Prefer in-memory fetch (no temp files, no subprocess)
+    result = _fetch_in_memory(video_id)
+    if result is not None:
+        if result.get("success"):
+            print(f"Got transcript: {len(result['transcript'])} chars")
+        return result
+
+    # Python API writing subtitle files (no subprocess)
     result = _fetch_via_python_api(video_id)
     if result is not None:
         print(f"Got transcript: {len(result['transcript'])} chars")